@@ -0,0 +1,193 @@
+"""
+Admission control check for /ask/ against a fake, rate-limited LLM.
+
+Drives src.api.main.app in process through httpx.ASGITransport, with
+src.llm.ask_gemini.generate_text replaced by a fake LLM, and checks that:
+
+  - a batch flood that fills the queue never sheds interactive requests
+    (they displace the newest batch waiters) and the queue never holds more
+    than max_queue requests;
+  - requests shed by admission control get 429 with a Retry-After header;
+  - an LLM rate limit raised inside process_document_query reaches the
+    client as 429 with the LLM's Retry-After, and batch requests are shed
+    during the cooldown that follows.
+
+Exits non-zero when a check fails, so it can run in CI (the MiniLM model must
+be in the local Hugging Face cache).
+
+    python benchmarks/admission_sim.py
+    python benchmarks/admission_sim.py --batch-clients 5 --batch-requests 6 --interactive-users 8
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from load_test import make_contract
+
+FILENAME = "contract.docx"
+
+
+class FakeLLM:
+    """Stand-in for generate_text: fixed latency, or a rate limit on every call once switched on"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.retry_after = None  # set to reject every call with this Retry-After
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        from src.llm.ask_gemini import LLMRateLimitError
+        with self._lock:
+            self.calls += 1
+        if self.retry_after is not None:
+            raise LLMRateLimitError("429 quota exceeded", retry_after=self.retry_after)
+        time.sleep(self.latency)
+        return "The agreement is governed by the laws of England."
+
+
+class Checks:
+    def __init__(self):
+        self.failed = []
+
+    def __call__(self, ok: bool, message: str):
+        print(f"{'PASS' if ok else 'FAIL'}: {message}")
+        if not ok:
+            self.failed.append(message)
+
+
+def configure(workdir: str):
+    """Point the app at a throwaway data directory (always, so a deployed env is never touched)"""
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "raw")
+    os.environ["VECTOR_DB_PERSIST_DIR"] = os.path.join(workdir, "vector_db")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["CATALOG_PATH"] = os.path.join(workdir, "catalog.sqlite3")
+    os.environ["ANSWER_CACHE_AUDIT_LOG"] = os.path.join(workdir, "answer_cache_audit.jsonl")
+    os.environ["ANSWER_CACHE_THRESHOLD"] = "2"  # every question must reach the LLM
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"  # keep Chroma offline
+    os.environ.pop("LLM_CASSETTE", None)
+    os.makedirs(os.environ["UPLOAD_DIR"], exist_ok=True)
+    with open(os.path.join(os.environ["UPLOAD_DIR"], FILENAME), "wb") as f:
+        f.write(make_contract(0, sections=20))
+
+
+def retry_after(response: httpx.Response) -> int:
+    """Retry-After as an int, 0 when missing or malformed"""
+    value = response.headers.get("retry-after", "")
+    return int(value) if value.isdigit() else 0
+
+
+async def ask(client: httpx.AsyncClient, client_id: str, priority: str, n: int) -> httpx.Response:
+    return await client.post(
+        "/ask/",
+        json={"filename": FILENAME, "question": f"Question {n} from {client_id}: which law governs the agreement?"},
+        headers={"X-Client-ID": client_id, "X-Request-Priority": priority},
+    )
+
+
+async def check_overload(client, main, args, check: Checks):
+    from src.api.admission import AdmissionController, BATCH
+
+    controller = main.admission = AdmissionController(
+        max_concurrent=args.max_concurrent, max_queue=args.max_queue,
+        max_queue_per_client=args.max_queue_per_client, queue_timeout=60,
+    )
+    depths, stop = [], asyncio.Event()
+
+    async def watch_queue():
+        while not stop.is_set():
+            depths.append(controller.queue_depth())
+            await asyncio.sleep(0.001)
+
+    async def interactive(user: int):
+        batch_waiting = controller.queue_depth(BATCH)
+        return batch_waiting, await ask(client, f"user-{user}", "interactive", user)
+
+    watcher = asyncio.create_task(watch_queue())
+    batch = [
+        asyncio.create_task(ask(client, f"batch-{c}", "batch", r))
+        for c in range(args.batch_clients) for r in range(args.batch_requests)
+    ]
+    await asyncio.sleep(args.llm_latency / 2)  # let the batch flood fill the queue
+    interactive_results = await asyncio.gather(*(interactive(u) for u in range(args.interactive_users)))
+    batch_responses = await asyncio.gather(*batch)
+    stop.set()
+    await watcher
+
+    shed = [r for r in batch_responses if r.status_code == 429]
+    rejected = controller.metrics()["rejected_total"]
+    print(f"       batch: {len(batch_responses) - len(shed)} answered, {len(shed)} shed; rejected_total={rejected}")
+    check(all(waiting > 0 for waiting, _ in interactive_results),
+          "batch requests were waiting whenever an interactive request arrived")
+    check(all(r.status_code == 200 for _, r in interactive_results),
+          f"no interactive request was shed ({[r.status_code for _, r in interactive_results]})")
+    check(rejected.get("preempted", 0) > 0, "interactive requests displaced queued batch requests")
+    check(max(depths) <= args.max_queue, f"queue depth peaked at {max(depths)} (max_queue {args.max_queue})")
+    check(bool(shed) and all(retry_after(r) >= 1 for r in shed), "shed batch requests got 429 with Retry-After")
+
+
+async def check_rate_limit(client, main, llm: FakeLLM, check: Checks):
+    from src.api.admission import AdmissionController
+
+    main.admission = AdmissionController(max_concurrent=2, max_queue=8, max_queue_per_client=4)
+    llm.retry_after = 7
+    try:
+        response = await ask(client, "user-rl", "interactive", 0)
+        check(response.status_code == 429 and retry_after(response) == 7,
+              f"LLM rate limit answered 429 with Retry-After 7 "
+              f"(got {response.status_code}, Retry-After {response.headers.get('retry-after')})")
+        response = await ask(client, "batch-rl", "batch", 0)
+        check(response.status_code == 429 and "llm_rate_limited" in response.text and retry_after(response) >= 1,
+              f"batch request shed during the LLM cooldown (got {response.status_code}: {response.text[:80]})")
+    finally:
+        llm.retry_after = None
+
+
+async def run(args) -> list:
+    configure(tempfile.mkdtemp(prefix="legal-admission-"))
+    import src.llm.ask_gemini as ask_gemini
+    import src.api.main as main
+
+    llm = FakeLLM(args.llm_latency)
+    ask_gemini.generate_text = llm.generate
+    check = Checks()
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://admission", timeout=120) as client:
+        # Ingest the contract before anything is timed
+        response = await ask(client, "warmup", "interactive", 0)
+        check(response.status_code == 200, f"warm-up question answered ({response.status_code})")
+        await check_overload(client, main, args, check)
+        await check_rate_limit(client, main, llm, check)
+    return check.failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check /ask/ admission control against a fake rate-limited LLM")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM latency (sec)")
+    parser.add_argument("--batch-clients", type=int, default=3)
+    parser.add_argument("--batch-requests", type=int, default=4, help="Parallel requests per batch client")
+    parser.add_argument("--interactive-users", type=int, default=4)
+    parser.add_argument("--max-concurrent", type=int, default=2)
+    parser.add_argument("--max-queue", type=int, default=6)
+    parser.add_argument("--max-queue-per-client", type=int, default=4)
+    args = parser.parse_args()
+
+    failed = asyncio.run(run(args))
+    if failed:
+        print(f"FAIL: {len(failed)} admission check(s) failed")
+        sys.exit(1)
+    print("OK: all admission checks passed")
+
+
+if __name__ == "__main__":
+    main()
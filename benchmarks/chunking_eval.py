@@ -0,0 +1,112 @@
+"""
+Compare fixed-window and clause-aware chunking at different top_k values.
+
+For every question in the benchmark set this retrieves context from an
+in-memory collection and records:
+  - context tokens (MiniLM tokenizer) sent to the LLM
+  - context recall: whether the expected answer text is in the retrieved context
+  - answer accuracy (with --llm): whether Gemini's answer contains it
+
+Questions file format (JSON list):
+    [{"document": "nda_sample.pdf", "question": "Which law governs?", "answer": "laws of India"}]
+
+Usage:
+    python benchmarks/chunking_eval.py --docs data/benchmark --questions data/benchmark/questions.json
+"""
+
+import os
+import sys
+import re
+import json
+import argparse
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import chromadb
+from src.parsers.document_loader import load_document
+from src.core.document_processor import get_embedder, build_chunks, build_prompt
+from src.vector_store import store_chunks
+from src.retriever import retrieve_relevant_chunks
+
+CONFIGS = [
+    # (label, chunking strategy, top_k, expand parent section)
+    ("fixed   k=5", "fixed", 5, False),
+    ("fixed   k=2", "fixed", 2, False),
+    ("clause  k=5", "clause", 5, False),
+    ("clause  k=2", "clause", 2, False),
+    ("clause  k=2 +parent", "clause", 2, True),
+]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def run(docs_dir: str, questions_path: str, use_llm: bool = False) -> dict:
+    with open(questions_path) as f:
+        questions = json.load(f)
+
+    embedder = get_embedder()
+    client = chromadb.EphemeralClient()
+    by_document = defaultdict(list)
+    for item in questions:
+        by_document[item["document"]].append(item)
+
+    stats = {label: {"questions": 0, "tokens": 0, "context_hits": 0, "answer_hits": 0} for label, *_ in CONFIGS}
+
+    for doc_index, (document, items) in enumerate(by_document.items()):
+        text = load_document(os.path.join(docs_dir, document))
+        collections = {}
+        for strategy in ("fixed", "clause"):
+            chunks, metadatas = build_chunks(text, strategy=strategy)
+            collection = client.get_or_create_collection(name=f"bench_{doc_index}_{strategy}")
+            store_chunks(chunks, collection, embedder=embedder, metadatas=metadatas)
+            collections[strategy] = collection
+
+        for label, strategy, top_k, expand_parent in CONFIGS:
+            for item in items:
+                context_chunks = retrieve_relevant_chunks(
+                    item["question"], collections[strategy], embedder=embedder,
+                    top_k=top_k, expand_parent=expand_parent
+                )
+                context = "\n\n".join(context_chunks)
+                expected = _normalize(item["answer"])
+
+                row = stats[label]
+                row["questions"] += 1
+                row["tokens"] += len(embedder.tokenizer.tokenize(context))
+                row["context_hits"] += expected in _normalize(context)
+                if use_llm:
+                    from src.llm.ask_gemini import ask_gemini
+                    answer = ask_gemini(build_prompt(context, item["question"]))
+                    row["answer_hits"] += expected in _normalize(answer)
+
+    return stats
+
+
+def print_stats(stats: dict, use_llm: bool):
+    header = f"{'config':<22}{'avg tokens':>12}{'context recall':>16}"
+    if use_llm:
+        header += f"{'answer acc':>12}"
+    print(header)
+    for label, row in stats.items():
+        n = max(row["questions"], 1)
+        line = f"{label:<22}{row['tokens'] / n:>12.0f}{row['context_hits'] / n:>16.2%}"
+        if use_llm:
+            line += f"{row['answer_hits'] / n:>12.2%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate chunking strategy and top_k")
+    parser.add_argument("--docs", required=True, help="Directory with benchmark documents")
+    parser.add_argument("--questions", required=True, help="JSON file with questions and expected answers")
+    parser.add_argument("--llm", action="store_true", help="Also score Gemini answers (needs GOOGLE_API_KEY)")
+    args = parser.parse_args()
+
+    print_stats(run(args.docs, args.questions, use_llm=args.llm), args.llm)
+
+
+if __name__ == "__main__":
+    main()
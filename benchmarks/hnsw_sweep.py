@@ -0,0 +1,233 @@
+"""
+Sweep HNSW index settings and measure recall@k, query latency and index size.
+
+Builds one collection per (space, M, construction_ef) combination through
+create_or_load_collection, then reopens and queries it at every search_ef
+(search_ef can change without a rebuild). Recall@k is measured against exact
+brute-force neighbours computed with numpy in the same space. Results go to a CSV; with
+matplotlib installed a recall-vs-latency plot is written next to it.
+
+Corpus options:
+  --docs DIR          chunk and embed every PDF/DOCX/TXT in DIR with MiniLM
+  (default)           chunk and embed synthetic contracts from load_test.py
+  --random-vectors N  N clustered random 384-d unit vectors, no model needed;
+                      use this to see the trade-off at large-corpus scale
+
+Held-out chunks (never indexed) are used as queries.
+
+    python benchmarks/hnsw_sweep.py --docs data/benchmark --k 5
+    python benchmarks/hnsw_sweep.py --random-vectors 200000 --m 8,16,32 --search-ef 10,25,50,100,200
+"""
+
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+from src.vector_store import create_or_load_collection
+
+
+def _ints(spec: str):
+    return [int(v) for v in spec.split(",")]
+
+
+def load_corpus(args) -> np.ndarray:
+    """Embeddings (float32, one row per chunk) for the benchmark corpus"""
+    if args.random_vectors:
+        rng = np.random.default_rng(args.seed)
+        centers = rng.normal(size=(max(1, args.random_vectors // 200), args.dim))
+        labels = rng.integers(len(centers), size=args.random_vectors)
+        vectors = centers[labels] + rng.normal(scale=0.6, size=(args.random_vectors, args.dim))
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    from src.core.document_processor import get_embedder, build_chunks
+    if args.docs:
+        from src.parsers.document_loader import load_document
+        texts = [
+            load_document(os.path.join(args.docs, name)) for name in sorted(os.listdir(args.docs))
+            if name.lower().endswith((".pdf", ".docx", ".txt"))
+        ]
+    else:
+        import io
+        import docx
+        from load_test import make_contract
+        texts = [
+            "\n".join(p.text for p in docx.Document(io.BytesIO(make_contract(i, sections=80))).paragraphs)
+            for i in range(args.synthetic_documents)
+        ]
+
+    chunks = []
+    for text in texts:
+        if text:
+            chunks.extend(build_chunks(text)[0])
+    print(f"Embedding {len(chunks)} chunks from {len(texts)} documents")
+    return np.asarray(get_embedder().encode(chunks, batch_size=64), dtype=np.float32)
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, space: str, k: int) -> np.ndarray:
+    """Indices of the true top-k neighbours of each query (brute force)"""
+    if space == "cosine":
+        corpus_n = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        queries_n = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        distances = -queries_n @ corpus_n.T
+    elif space == "ip":
+        distances = -queries @ corpus.T
+    else:
+        distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ corpus.T + (corpus ** 2).sum(1)[None, :]
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return top
+
+
+def directory_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
+
+
+def estimated_index_bytes(count: int, dim: int, m: int) -> int:
+    # hnswlib level 0: float32 vector, 2*M neighbour ids, link count and label per element
+    return count * (4 * dim + 8 * m + 12)
+
+
+def build(corpus: np.ndarray, settings: dict, workdir: str):
+    client = chromadb.PersistentClient(path=workdir, settings=Settings(anonymized_telemetry=False))
+    collection = create_or_load_collection(client, collection_name="hnsw_sweep", index_settings=settings)
+    batch = client.get_max_batch_size()
+    started = time.perf_counter()
+    for offset in range(0, len(corpus), batch):
+        rows = corpus[offset:offset + batch]
+        collection.add(ids=[str(i) for i in range(offset, offset + len(rows))], embeddings=rows.tolist())
+    return client, time.perf_counter() - started
+
+
+def measure(collection, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k, include=[])  # load the index
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        latencies.append(time.perf_counter() - started)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "recall_at_k": round(hits / (k * len(queries)), 4),
+        "latency_avg_ms": round(float(latencies.mean()), 3),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def plot(rows: list, path: str):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed; skipping plot")
+        return
+
+    builds = {}
+    for row in rows:
+        builds.setdefault((row["space"], row["M"], row["construction_ef"]), []).append(row)
+    figure, axis = plt.subplots(figsize=(8, 5))
+    for (space, m, construction_ef), points in builds.items():
+        points.sort(key=lambda r: r["search_ef"])
+        size_mb = points[0]["estimated_index_mb"]
+        axis.plot(
+            [p["latency_avg_ms"] for p in points], [p["recall_at_k"] for p in points], marker="o",
+            label=f"{space} M={m} ef_c={construction_ef} (~{size_mb:.0f} MB)"
+        )
+        for p in points:
+            axis.annotate(str(p["search_ef"]), (p["latency_avg_ms"], p["recall_at_k"]), fontsize=7)
+    axis.set_xlabel("avg query latency (ms)")
+    axis.set_ylabel(f"recall@{rows[0]['k']}")
+    axis.set_title("HNSW recall vs latency (points labelled with search_ef)")
+    axis.grid(alpha=0.3)
+    axis.legend(fontsize=7)
+    figure.tight_layout()
+    figure.savefig(path, dpi=120)
+    print(f"Plot written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep HNSW settings for recall, latency and index size")
+    parser.add_argument("--docs", help="Directory of PDF/DOCX/TXT documents to use as the corpus")
+    parser.add_argument("--synthetic-documents", type=int, default=20, help="Synthetic contracts without --docs")
+    parser.add_argument("--random-vectors", type=int, default=0, help="Use N random vectors instead of documents")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of --random-vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Held-out chunks used as queries")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--spaces", default="cosine,l2")
+    parser.add_argument("--m", default="8,16,32")
+    parser.add_argument("--construction-ef", default="100,200")
+    parser.add_argument("--search-ef", default="10,25,50,100,200")
+    parser.add_argument("--output", default="hnsw_sweep.csv")
+    parser.add_argument("--plot", help="Plot path (default: next to --output)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = load_corpus(args)
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(vectors))
+    held_out = min(args.queries, len(vectors) // 5)
+    queries, corpus = vectors[order[:held_out]], vectors[order[held_out:]]
+    if len(corpus) <= args.k or not held_out:
+        raise SystemExit(f"Corpus too small ({len(vectors)} vectors) for k={args.k}")
+    print(f"{len(corpus)} indexed vectors, {len(queries)} queries, dim {corpus.shape[1]}")
+
+    rows = []
+    for space in args.spaces.split(","):
+        truth = exact_neighbours(corpus, queries, space, args.k)
+        for m in _ints(args.m):
+            for construction_ef in _ints(args.construction_ef):
+                workdir = tempfile.mkdtemp(prefix="hnsw-sweep-")
+                client = None
+                try:
+                    settings = {"space": space, "M": m, "construction_ef": construction_ef}
+                    client, build_seconds = build(corpus, settings, workdir)
+                    disk_bytes = directory_bytes(workdir)
+                    for search_ef in _ints(args.search_ef):
+                        # A loaded index keeps its search_ef; reopen so the new value is used
+                        client.clear_system_cache()
+                        client = chromadb.PersistentClient(path=workdir, settings=Settings(anonymized_telemetry=False))
+                        collection = create_or_load_collection(
+                            client, collection_name="hnsw_sweep", index_settings={**settings, "search_ef": search_ef}
+                        )
+                        row = {
+                            "space": space, "M": m, "construction_ef": construction_ef, "search_ef": search_ef,
+                            "k": args.k, "vectors": len(corpus), "build_s": round(build_seconds, 2),
+                            "disk_mb": round(disk_bytes / 2**20, 2),
+                            "estimated_index_mb": round(estimated_index_bytes(len(corpus), corpus.shape[1], m) / 2**20, 2),
+                            **measure(collection, queries, truth, args.k),
+                        }
+                        rows.append(row)
+                        print(
+                            f"{space:>6} M={m:<3} ef_c={construction_ef:<4} ef_s={search_ef:<4} "
+                            f"recall@{args.k}={row['recall_at_k']:.3f}  avg={row['latency_avg_ms']:.2f}ms  "
+                            f"p95={row['latency_p95_ms']:.2f}ms  disk={row['disk_mb']:.1f}MB  "
+                            f"est={row['estimated_index_mb']:.1f}MB"
+                        )
+                finally:
+                    if client is not None:
+                        client.clear_system_cache()
+                    shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results written to {args.output}")
+    plot(rows, args.plot or os.path.splitext(args.output)[0] + ".png")
+
+
+if __name__ == "__main__":
+    main()
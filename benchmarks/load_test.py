@@ -0,0 +1,292 @@
+"""
+Load test for the FastAPI app with recorded LLM responses.
+
+Drives a configurable mix of uploads, asks, document listings and content
+fetches at several concurrency levels and reports throughput, p50/p99
+latency, error rate and worker RSS for each level.
+
+Gemini is never called: LLM responses are replayed from a cassette (see
+src/llm/cassette.py) with latencies sampled from the recording. The bundled
+benchmarks/cassettes/legal_qa.json is synthetic; record a real one with
+LLM_CASSETTE=<path> LLM_CASSETTE_MODE=record while using the app normally.
+
+In-process (default; runs offline in CI once the MiniLM model is in the local
+Hugging Face cache, e.g. with HF_HUB_OFFLINE=1):
+    python benchmarks/load_test.py --concurrency 1,4,16 --requests 200
+
+Against a running server (start it with LLM_CASSETTE set), reporting the RSS
+of each uvicorn worker under --server-pid:
+    python benchmarks/load_test.py --base-url http://localhost:8000 --server-pid 12345
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+import psutil
+import docx
+
+DEFAULT_CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "legal_qa.json")
+
+QUESTIONS = [
+    "Who are the parties to this agreement?",
+    "When does the agreement come into force?",
+    "What law governs the agreement?",
+    "How can the agreement be terminated?",
+    "How long do the confidentiality obligations last?",
+    "What information is excluded from confidentiality?",
+    "Can the agreement be assigned?",
+    "When are invoices payable?",
+    "Summarize the document.",
+    "What happens to confidential information after termination?",
+]
+
+CLAUSES = [
+    "Definitions. \"Confidential Information\" means any information disclosed by the Disclosing Party to the Receiving Party.",
+    "Obligations. The Receiving Party shall keep the Confidential Information strictly confidential.",
+    "Exclusions. Obligations do not apply to information that is publicly available.",
+    "Term. This Agreement remains in force for {years} years from the Effective Date.",
+    "Termination. Either party may terminate this Agreement with {days} days' written notice.",
+    "Payment. Fees are payable within {days} days of receipt of a valid invoice.",
+    "Assignment. Neither party may assign this Agreement without prior written consent.",
+    "Governing Law. This Agreement is governed by the laws of {law}.",
+]
+
+
+def make_contract(index: int, sections: int = 40) -> bytes:
+    """Synthetic NDA-style DOCX with numbered clauses"""
+    rng = random.Random(index)
+    document = docx.Document()
+    document.add_paragraph("NON-DISCLOSURE AGREEMENT")
+    document.add_paragraph(
+        f"This Agreement is made on {rng.randint(1, 28)}th August 2025 by and between "
+        f"Alpha {index} Pvt. Ltd. and Beta {index} Inc."
+    )
+    for number in range(1, sections + 1):
+        clause = rng.choice(CLAUSES).format(
+            years=rng.randint(1, 5), days=rng.choice([15, 30, 45, 60]), law=rng.choice(["India", "England"])
+        )
+        filler = " ".join(rng.choice(clause.split()) for _ in range(rng.randint(40, 120)))
+        document.add_paragraph(f"{number}. {clause} {filler}.")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"upload", "ask", "list", "content"}
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def worker_rss(server_pid=None) -> dict:
+    """RSS in MB of this process, or of every worker of the server at server_pid"""
+    if server_pid is None:
+        return {"in-process": psutil.Process().memory_info().rss / 2**20}
+    parent = psutil.Process(server_pid)
+    processes = parent.children(recursive=True) or [parent]
+    return {f"pid {p.pid}": p.memory_info().rss / 2**20 for p in processes}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, mix: dict, contracts: list):
+        self.client = client
+        self.mix = mix
+        self.contracts = contracts
+        self.filenames = []
+
+    async def upload(self, user: int):
+        body = random.choice(self.contracts)
+        response = await self.client.post(
+            "/upload/", files={"file": (f"contract_{user}.docx", body)}
+        )
+        if response.status_code == 200:
+            self.filenames.append(response.json()["filename"])
+        return response
+
+    async def ask(self, user: int):
+        if not self.filenames:
+            return None  # nothing uploaded yet
+        return await self.client.post(
+            "/ask/",
+            json={"filename": random.choice(self.filenames), "question": random.choice(QUESTIONS)},
+            headers={"X-Client-ID": f"load-user-{user}"},
+        )
+
+    async def list(self, user: int):
+        return await self.client.get("/documents/")
+
+    async def content(self, user: int):
+        if not self.filenames:
+            return None
+        return await self.client.get(f"/documents/{random.choice(self.filenames)}/content")
+
+    async def seed(self, count: int):
+        """Upload and ingest some documents so asks measure steady state"""
+        for i in range(count):
+            await self.upload(i)
+        for filename in list(self.filenames):
+            await self.client.post("/ask/", json={"filename": filename, "question": QUESTIONS[0]})
+
+    async def run_level(self, concurrency: int, total_requests: int) -> dict:
+        operations = list(self.mix)
+        weights = [self.mix[op] for op in operations]
+        samples = []
+        skipped = defaultdict(int)
+        issued = 0
+
+        async def user_loop(user: int):
+            nonlocal issued
+            while issued < total_requests:
+                issued += 1
+                op = random.choices(operations, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = await getattr(self, op)(user)
+                    if response is None:
+                        skipped[op] += 1
+                        continue
+                    status = response.status_code
+                    # The pipeline reports some failures as an "Error: ..." answer with 200
+                    if op == "ask" and status == 200 and response.json()["answer"].startswith("Error"):
+                        status = "error-answer"
+                except httpx.HTTPError:
+                    status = 0
+                samples.append((op, status, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user_loop(user) for user in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return summarize(samples, elapsed, skipped)
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(int(p * len(values)), len(values) - 1)] if values else 0.0
+
+
+def summarize(samples: list, elapsed: float, skipped: dict = None) -> dict:
+    """Throughput, latency and status counts; skipped ops (no document to target) are reported apart"""
+    by_op = defaultdict(list)
+    statuses = defaultdict(int)
+    for op, status, latency in samples:
+        by_op[op].append(latency)
+        statuses[status] += 1
+    latencies = [latency for _, _, latency in samples]
+    errors = sum(
+        count for status, count in statuses.items() if not (isinstance(status, int) and 200 <= status < 300)
+    )
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "statuses": dict(statuses),
+        "skipped": dict(skipped or {}),
+        "per_operation": {
+            op: {"count": len(v), "p50_ms": _percentile(v, 0.5) * 1000, "p99_ms": _percentile(v, 0.99) * 1000}
+            for op, v in by_op.items()
+        },
+    }
+
+
+def configure_in_process(args):
+    """Point the app at a throwaway data directory (always, so a deployed env is never touched) and the replay cassette"""
+    workdir = tempfile.mkdtemp(prefix="legal-load-")
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "raw")
+    os.environ["VECTOR_DB_PERSIST_DIR"] = os.path.join(workdir, "vector_db")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["CATALOG_PATH"] = os.path.join(workdir, "catalog.sqlite3")
+    os.environ["ANSWER_CACHE_AUDIT_LOG"] = os.path.join(workdir, "answer_cache_audit.jsonl")
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"  # keep Chroma offline
+    os.environ["LLM_CASSETTE"] = args.cassette
+    os.environ["LLM_CASSETTE_MODE"] = "replay"
+    os.environ["LLM_CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+    if args.no_answer_cache:
+        os.environ["ANSWER_CACHE_THRESHOLD"] = "2"  # cosine never exceeds 1
+
+
+async def main_async(args):
+    random.seed(args.seed)
+    mix = parse_mix(args.mix)
+    contracts = [make_contract(i, sections=args.sections) for i in range(args.distinct_documents)]
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        configure_in_process(args)
+        from src.api.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        test = LoadTest(client, mix, contracts)
+        await test.seed(args.seed_documents)
+        for concurrency in args.concurrency:
+            result = await test.run_level(concurrency, args.requests)
+            result["concurrency"] = concurrency
+            result["rss_mb"] = worker_rss(args.server_pid)
+            results.append(result)
+            print_level(result)
+    return results
+
+
+def print_level(result: dict):
+    rss = ", ".join(f"{name}={mb:.0f}MB" for name, mb in result["rss_mb"].items())
+    print(
+        f"[c={result['concurrency']:>3}] {result['requests']} req  "
+        f"{result['throughput_rps']:.2f} req/s  p50={result['p50_ms']:.0f}ms  p99={result['p99_ms']:.0f}ms  "
+        f"errors={result['error_rate']:.1%}  RSS: {rss}"
+    )
+    if result["skipped"]:
+        skipped = ", ".join(f"{op}={n}" for op, n in sorted(result["skipped"].items()))
+        print(f"{'':8}skipped (no uploaded documents): {skipped}")
+    for op, row in sorted(result["per_operation"].items()):
+        print(f"{'':8}{op:<8} n={row['count']:<5} p50={row['p50_ms']:.0f}ms p99={row['p99_ms']:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the legal review API with replayed LLM responses")
+    parser.add_argument("--base-url", help="Test a running server instead of the in-process app")
+    parser.add_argument("--server-pid", type=int, help="PID of the server master, to report worker RSS")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--mix", default="upload=1,ask=6,list=2,content=1", help="Operation weights")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE, help="LLM cassette to replay (in-process)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply replayed LLM latencies")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Disable the semantic answer cache")
+    parser.add_argument("--seed-documents", type=int, default=3, help="Documents uploaded before measuring")
+    parser.add_argument("--distinct-documents", type=int, default=5, help="Distinct synthetic contracts")
+    parser.add_argument("--sections", type=int, default=40, help="Numbered clauses per contract")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
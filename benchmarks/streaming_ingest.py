@@ -0,0 +1,239 @@
+"""
+Memory ceiling check for streaming ingestion.
+
+Generates a synthetic multi-page contract, ingests it with
+ingest_document_stream into a throwaway vector store and samples the process
+RSS every few milliseconds. The same document is also ingested the in-memory
+way (load_document + build_chunks + ingest_chunks); each mode runs in its own
+process so neither inherits the other's heap.
+
+The ceiling is derived from the batch sizes plus a small per-page allowance
+for what any ingestion keeps (the vector index and the chunk manifest), and
+the default page count is the one at which the in-memory path should need
+well over that ceiling. The check fails unless streaming stays under the
+ceiling and the in-memory path goes over it, so a change that makes streaming
+hold the document fails it. It can run as a regression check in CI (the
+MiniLM model must be in the local Hugging Face cache; the default document
+takes a while to embed twice).
+
+    python benchmarks/streaming_ingest.py
+    python benchmarks/streaming_ingest.py --format docx --embed-batch 16 --store-batch 128
+    python benchmarks/streaming_ingest.py --pages 2000 --no-compare
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import psutil
+
+# RSS growth that depends on neither the batches nor the document: Chroma, SQLite, allocator slack
+BASE_MB = 24
+# Embedding activations per text of a micro-batch as seen in sampled RSS (MiniLM frees them layer by layer)
+ACTIVATION_MB_PER_TEXT = 0.5
+# One chunk of a store batch: text, metadata, embedding as a Python list and Chroma's copies
+STORED_CHUNK_MB = 0.05
+# Kept per page by either path: HNSW index entries, chunk ids for the manifest (measured ~0.007)
+INDEX_MB_PER_PAGE = 0.0075
+# Held per page by the in-memory path: text, lines, chunks, metadata, embeddings (measured ~0.0137)
+IN_MEMORY_MB_PER_PAGE = 0.014
+
+CLAUSES = [
+    "The Receiving Party shall keep the Confidential Information strictly confidential.",
+    "Fees are payable within {days} days of receipt of a valid invoice.",
+    "Either party may terminate this Agreement with {days} days' written notice.",
+    "Neither party may assign this Agreement without prior written consent.",
+    "This Agreement is governed by the laws of {law}.",
+    "Obligations do not apply to information that is publicly available.",
+]
+
+
+def page_lines(page: int, rng: random.Random, lines_per_page: int = 45):
+    """Text lines of one synthetic exhibit page: a numbered section and its body"""
+    lines = [f"{page + 1}. Exhibit {page + 1} Terms"]
+    while len(lines) < lines_per_page:
+        clause = rng.choice(CLAUSES).format(days=rng.choice([15, 30, 60]), law=rng.choice(["India", "England"]))
+        lines.append(f"Page {page + 1} line {len(lines)}: {clause}")
+    return lines
+
+
+def write_pdf(path: str, pages: int, seed: int = 0):
+    """Minimal text-only PDF written object by object, one page at a time"""
+    rng = random.Random(seed)
+    offsets = []
+    with open(path, "wb") as f:
+        def obj(number, body: bytes):
+            offsets.append((number, f.tell()))
+            f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(2, f"<< /Type /Pages /Count {pages} /Kids [{kids}] >>".encode())
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i in range(pages):
+            escaped = [
+                line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                for line in page_lines(i, rng)
+            ]
+            stream = ("BT /F1 9 Tf 11 TL 40 800 Td " + " T* ".join(f"({line}) Tj" for line in escaped) + " ET").encode()
+            obj(4 + 2 * i, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+            ).encode())
+            obj(5 + 2 * i, f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+        xref = f.tell()
+        count = 3 + 2 * pages
+        f.write(f"xref\n0 {count + 1}\n0000000000 65535 f \n".encode())
+        for _, offset in sorted(offsets):
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {count + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def write_docx(path: str, pages: int, seed: int = 0):
+    import docx
+    from docx.enum.text import WD_BREAK
+
+    rng = random.Random(seed)
+    document = docx.Document()
+    for i in range(pages):
+        paragraphs = page_lines(i, rng)
+        for line in paragraphs:
+            paragraph = document.add_paragraph(line)
+        paragraph.add_run().add_break(WD_BREAK.PAGE)
+    document.save(path)
+
+
+def default_ceiling_mb(pages: int, embed_batch: int, store_batch: int) -> float:
+    """RSS growth streaming ingestion may need: the batches plus the index, never the document text"""
+    return (
+        BASE_MB + embed_batch * ACTIVATION_MB_PER_TEXT + store_batch * STORED_CHUNK_MB
+        + pages * INDEX_MB_PER_PAGE
+    )
+
+
+def default_pages(store_batch: int) -> int:
+    """
+    Pages at which the in-memory path should exceed the ceiling by as much
+    again as its fixed part (the embedder's activations are the same for both paths)
+    """
+    fixed = BASE_MB + store_batch * STORED_CHUNK_MB
+    return math.ceil(2 * fixed / (IN_MEMORY_MB_PER_PAGE - INDEX_MB_PER_PAGE))
+
+
+def configure(workdir: str):
+    """Point the catalog and vector store at a throwaway directory"""
+    os.environ.setdefault("VECTOR_DB_PERSIST_DIR", os.path.join(workdir, "vector_db"))
+    os.environ.setdefault("CACHE_DIR", os.path.join(workdir, "cache"))
+    os.environ.setdefault("CATALOG_PATH", os.path.join(workdir, "catalog.sqlite3"))
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")  # keep Chroma offline
+
+
+def ingest(file_path: str, streaming: bool, args) -> dict:
+    from src.core.catalog import get_persist_dir, register_document
+    from src.core.document_processor import (
+        RssSampler, get_embedder, build_chunks, ingest_chunks, ingest_document_stream
+    )
+    from src.parsers.document_loader import load_document
+    from src.vector_store import init_chroma_db, create_or_load_collection
+
+    filename = f"{'stream' if streaming else 'memory'}_{os.path.basename(file_path)}"
+    collection = create_or_load_collection(
+        init_chroma_db(persist_directory=get_persist_dir()),
+        collection_name=register_document(filename)["collection_name"]
+    )
+    embedder = get_embedder()
+    baseline = psutil.Process().memory_info().rss
+    sampler = RssSampler()
+    sampler.start()
+    started = time.perf_counter()
+    if streaming:
+        stats = ingest_document_stream(
+            filename, file_path, collection, embedder=embedder,
+            embed_batch_size=args.embed_batch, store_batch_size=args.store_batch
+        )
+    else:
+        chunks, metadatas = build_chunks(load_document(file_path))
+        stats = ingest_chunks(filename, chunks, metadatas, collection, embedder=embedder)
+        stats["chunks"] = len(chunks)
+    elapsed = time.perf_counter() - started
+    peak = sampler.stop()
+    return {**stats, "seconds": elapsed, "baseline_mb": baseline / 2**20, "growth_mb": (peak - baseline) / 2**20}
+
+
+def run_mode(mode: str, file_path: str, workdir: str, args) -> dict:
+    """Ingest in a fresh interpreter so the measurement starts from a clean heap"""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker", mode, "--file", file_path, "--workdir", workdir,
+        "--embed-batch", str(args.embed_batch), "--store-batch", str(args.store_batch),
+    ]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def worker(args):
+    configure(args.workdir)
+    from src.core.document_processor import get_embedder
+    get_embedder()  # load the model before measuring
+    print(json.dumps(ingest(args.file, args.worker == "streaming", args)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the memory ceiling of streaming ingestion")
+    parser.add_argument("--pages", type=int, help="Default: enough for the in-memory path to exceed the ceiling")
+    parser.add_argument("--format", choices=["pdf", "docx"], default="pdf")
+    parser.add_argument("--ceiling-mb", type=float, help="Allowed RSS growth while ingesting (default: from the batch sizes)")
+    parser.add_argument("--embed-batch", type=int, default=32)
+    parser.add_argument("--store-batch", type=int, default=256)
+    parser.add_argument("--compare", action=argparse.BooleanOptionalAction, default=True,
+                        help="Also ingest without streaming and require it to exceed the ceiling")
+    parser.add_argument("--worker", choices=["streaming", "in-memory"], help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    pages = args.pages or default_pages(args.store_batch)
+    ceiling = args.ceiling_mb or default_ceiling_mb(pages, args.embed_batch, args.store_batch)
+    workdir = tempfile.mkdtemp(prefix="legal-streaming-")
+    configure(workdir)
+    file_path = os.path.join(workdir, f"exhibits_{pages}p.{args.format}")
+    (write_pdf if args.format == "pdf" else write_docx)(file_path, pages)
+    print(f"Generated {pages}-page {args.format.upper()} ({os.path.getsize(file_path) / 2**20:.1f} MB), "
+          f"ceiling {ceiling:.0f} MB")
+
+    modes = ["streaming"] + (["in-memory"] if args.compare else [])
+    results = {}
+    for mode in modes:
+        results[mode] = result = run_mode(mode, file_path, workdir, args)
+        print(
+            f"{mode:>10}: {result['chunks']} chunks in {result['seconds']:.1f}s  "
+            f"baseline {result['baseline_mb']:.0f} MB  peak growth {result['growth_mb']:.0f} MB"
+        )
+
+    growth = results["streaming"]["growth_mb"]
+    if growth > ceiling:
+        print(f"FAIL: streaming ingestion grew RSS by {growth:.0f} MB (ceiling {ceiling:.0f} MB)")
+        sys.exit(1)
+    if args.compare and results["in-memory"]["growth_mb"] <= ceiling:
+        # Both paths fit: the input is too small for the ceiling to tell them apart
+        print(f"FAIL: in-memory ingestion also stayed under the {ceiling:.0f} MB ceiling "
+              f"({results['in-memory']['growth_mb']:.0f} MB); use more --pages")
+        sys.exit(1)
+    print(f"OK: streaming ingestion stayed under the {ceiling:.0f} MB ceiling"
+          + (" that in-memory ingestion exceeds" if args.compare else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Memory and throughput of the API at 1, 2, 4 and 8 workers.
+
+Starts the server once per worker count, waits for it to come up, drives it
+with the load_test.py request mix (LLM calls replayed from a cassette) and
+reports throughput plus RSS and PSS summed over all server processes. RSS
+counts copy-on-write shared pages once per process; PSS splits them between
+the processes sharing them, so it is the number to compare.
+
+    python benchmarks/worker_scaling.py                      # preload-and-fork (src.api.server)
+    python benchmarks/worker_scaling.py --mode uvicorn       # baseline: uvicorn --workers N
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+import psutil
+
+from load_test import DEFAULT_CASSETTE, LoadTest, make_contract, parse_mix
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def start_server(mode: str, workers: int, port: int, args) -> subprocess.Popen:
+    workdir = tempfile.mkdtemp(prefix=f"legal-workers-{workers}-")
+    env = dict(
+        os.environ,
+        UPLOAD_DIR=os.path.join(workdir, "raw"),
+        VECTOR_DB_PERSIST_DIR=os.path.join(workdir, "vector_db"),
+        CACHE_DIR=os.path.join(workdir, "cache"),
+        CATALOG_PATH=os.path.join(workdir, "catalog.sqlite3"),
+        ANSWER_CACHE_AUDIT_LOG=os.path.join(workdir, "answer_cache_audit.jsonl"),
+        ANONYMIZED_TELEMETRY="False",
+        LLM_CASSETTE=args.cassette,
+        LLM_CASSETTE_MODE="replay",
+        LLM_CASSETTE_LATENCY_SCALE=str(args.latency_scale),
+        LOG_LEVEL="WARNING",
+    )
+    if mode == "fork":
+        command = [sys.executable, "-m", "src.api.server", "--port", str(port), "--workers", str(workers)]
+        if args.threads_per_worker:
+            command += ["--threads-per-worker", str(args.threads_per_worker)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+
+def wait_until_ready(process: subprocess.Popen, port: int, workers: int, timeout: float = 300):
+    """Wait for /health to answer and for every worker to finish loading the embedder"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=5).status_code == 200:
+                children = psutil.Process(process.pid).children(recursive=True)
+                if len(children) >= workers:
+                    time.sleep(2)  # let the remaining workers run their startup event
+                    return
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    raise TimeoutError("Server did not become ready")
+
+
+def server_memory(pid: int) -> dict:
+    """RSS and PSS (MB) summed over the server process tree"""
+    parent = psutil.Process(pid)
+    processes = [parent] + parent.children(recursive=True)
+    rss = pss = 0
+    for process in processes:
+        info = process.memory_full_info()
+        rss += info.rss
+        pss += getattr(info, "pss", info.rss)
+    return {"processes": len(processes), "rss_mb": rss / 2**20, "pss_mb": pss / 2**20}
+
+
+async def drive(port: int, workers: int, args) -> dict:
+    mix = parse_mix(args.mix)
+    contracts = [make_contract(i) for i in range(5)]
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout) as client:
+        test = LoadTest(client, mix, contracts)
+        await test.seed(args.seed_documents)
+        return await test.run_level(args.concurrency_per_worker * workers, args.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RSS and throughput across worker counts")
+    parser.add_argument("--mode", choices=["fork", "uvicorn"], default="fork")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--threads-per-worker", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency-per-worker", type=int, default=4)
+    parser.add_argument("--mix", default="ask=8,list=1,content=1")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--seed-documents", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    random.seed(0)
+
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>9}"
+          f"{'RSS idle':>11}{'PSS idle':>11}{'RSS load':>11}{'PSS load':>11}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        process = start_server(args.mode, workers, args.port, args)
+        try:
+            wait_until_ready(process, args.port, workers)
+            idle = server_memory(process.pid)
+            result = asyncio.run(drive(args.port, workers, args))
+            loaded = server_memory(process.pid)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+        print(f"{workers:>8}{result['throughput_rps']:>10.2f}{result['p50_ms']:>10.0f}{result['p99_ms']:>10.0f}"
+              f"{result['error_rate']:>9.1%}{idle['rss_mb']:>9.0f}MB{idle['pss_mb']:>9.0f}MB"
+              f"{loaded['rss_mb']:>9.0f}MB{loaded['pss_mb']:>9.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
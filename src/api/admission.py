@@ -0,0 +1,226 @@
+"""
+Admission control for LLM-bound requests.
+
+Limits how many queries run the RAG pipeline at once and queues the rest in a
+bounded, prioritized queue: interactive requests are always admitted before
+batch requests, and within a priority clients are served round-robin so one
+busy client cannot starve the others. When the queue is full, a client has
+too many requests waiting, or a request has waited too long, the request is
+shed with an ``Overloaded`` error carrying a Retry-After hint. An interactive
+request arriving at a full queue takes the place of the newest batch waiter.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)  # highest first
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Async admission controller; one instance per worker event loop.
+
+    Args:
+        max_concurrent (int): Requests allowed to run the pipeline at once
+        max_queue (int): Requests allowed to wait, across all clients
+        max_queue_per_client (int): Requests a single client may have waiting
+        queue_timeout (float): Seconds a request may wait before it is shed
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 32,
+                 max_queue_per_client: int = 8, queue_timeout: float = 30.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.queue_timeout = queue_timeout
+
+        self._running = 0
+        # priority -> client -> waiting futures; OrderedDict order is the round-robin order
+        self._waiting: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._cooldown_until = 0.0
+        self._sequence = 0
+        self._enqueued: Dict[asyncio.Future, int] = {}  # waiter -> arrival order
+
+        self._admitted = 0
+        self._rejected: Dict[str, int] = {}
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+        self._service_time = 5.0  # exponential moving average, seconds
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_concurrent=int(os.environ.get("MAX_CONCURRENT_QUERIES", "4")),
+            max_queue=int(os.environ.get("MAX_QUEUED_QUERIES", "32")),
+            max_queue_per_client=int(os.environ.get("MAX_QUEUED_PER_CLIENT", "8")),
+            queue_timeout=float(os.environ.get("QUEUE_TIMEOUT_SECONDS", "30")),
+        )
+
+    # -- queue bookkeeping -------------------------------------------------
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        priorities = [priority] if priority else PRIORITIES
+        return sum(len(q) for p in priorities for q in self._waiting[p].values())
+
+    def _client_depth(self, client: str) -> int:
+        return sum(len(self._waiting[p].get(client, ())) for p in PRIORITIES)
+
+    def _retry_after(self) -> int:
+        backlog = (self.queue_depth() + self._running) / max(self.max_concurrent, 1)
+        estimate = backlog * self._service_time
+        cooldown = self._cooldown_until - time.monotonic()
+        return max(1, int(max(estimate, cooldown) + 0.5))
+
+    def _reject(self, reason: str):
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        raise Overloaded(reason, self._retry_after())
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for priority in PRIORITIES:
+            clients = self._waiting[priority]
+            while clients:
+                client, queue = next(iter(clients.items()))
+                future = queue.popleft()
+                # Move the client to the back so the next pick goes to someone else
+                del clients[client]
+                if queue:
+                    clients[client] = queue
+                if not future.done():
+                    return future
+        return None
+
+    def _remove_waiter(self, priority: str, client: str, future: asyncio.Future):
+        queue = self._waiting[priority].get(client)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+        if not queue:
+            del self._waiting[priority][client]
+
+    def _preempt_batch_waiter(self) -> bool:
+        """Shed the most recently queued batch request to make room; False if there is none"""
+        waiting = [
+            (self._enqueued[future], client, future)
+            for client, queue in self._waiting[BATCH].items() for future in queue if not future.done()
+        ]
+        if not waiting:
+            return False
+        _, client, future = max(waiting, key=lambda item: item[0])
+        self._remove_waiter(BATCH, client, future)
+        self._rejected["preempted"] = self._rejected.get("preempted", 0) + 1
+        future.set_exception(Overloaded("preempted", self._retry_after()))
+        return True
+
+    def _release(self):
+        waiter = self._next_waiter()
+        if waiter is not None:
+            # Hand the slot straight to the next waiter
+            waiter.set_result(None)
+        else:
+            self._running -= 1
+
+    # -- public API --------------------------------------------------------
+
+    def note_rate_limited(self, retry_after: float):
+        """
+        Record an upstream LLM rate limit: batch work is shed until it expires
+        and Retry-After hints include the remaining cooldown.
+        """
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+
+    @asynccontextmanager
+    async def slot(self, client: str, priority: str = INTERACTIVE):
+        """
+        Wait for a pipeline slot. Raises Overloaded if the request is shed.
+
+        Usage:
+            async with controller.slot(client_id, priority):
+                answer = await run_in_threadpool(...)
+        """
+        if priority not in PRIORITIES:
+            priority = INTERACTIVE
+        enqueued_at = time.monotonic()
+
+        if priority == BATCH and time.monotonic() < self._cooldown_until:
+            self._reject("llm_rate_limited")
+
+        if self._running < self.max_concurrent and self.queue_depth() == 0:
+            self._running += 1
+        else:
+            if self._client_depth(client) >= self.max_queue_per_client:
+                self._reject("client_queue_full")
+            if self.queue_depth() >= self.max_queue:
+                # Interactive requests displace queued batch work rather than being shed
+                if priority != INTERACTIVE or not self._preempt_batch_waiter():
+                    self._reject("queue_full")
+
+            future = asyncio.get_running_loop().create_future()
+            self._waiting[priority].setdefault(client, deque()).append(future)
+            self._sequence += 1
+            self._enqueued[future] = self._sequence
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._remove_waiter(priority, client, future)
+                if future.done() and future.exception() is None:
+                    # Slot was handed over just as we timed out; pass it on
+                    self._release()
+                self._reject("queue_timeout")
+            except asyncio.CancelledError:
+                # Client went away while waiting
+                self._remove_waiter(priority, client, future)
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    self._release()
+                raise
+            finally:
+                self._enqueued.pop(future, None)
+
+        self._admitted += 1
+        started_at = time.monotonic()
+        self._wait_times.append(started_at - enqueued_at)
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started_at
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._release()
+
+    def metrics(self) -> dict:
+        waits = sorted(self._wait_times)
+
+        def percentile(p):
+            return round(waits[min(int(p * len(waits)), len(waits) - 1)], 3) if waits else 0.0
+
+        return {
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": {priority: self.queue_depth(priority) for priority in PRIORITIES},
+            "max_queue": self.max_queue,
+            "admitted_total": self._admitted,
+            "rejected_total": dict(self._rejected),
+            "wait_seconds": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99)},
+            "avg_service_seconds": round(self._service_time, 3),
+            "llm_cooldown_seconds": round(max(0.0, self._cooldown_until - time.monotonic()), 1),
+        }
@@ -1,6 +1,7 @@
 # api/main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import shutil
@@ -8,9 +9,19 @@ import os
 import uuid
 import logging
 from datetime import datetime
+from typing import Optional
 
-from src.api.models import QueryRequest, QueryResponse, UploadResponse, DocumentInfo, ErrorResponse
-from src.core.document_processor import process_document_query
+from src.api.models import (
+    QueryRequest, QueryResponse, UploadResponse, DocumentInfo, ErrorResponse, VersionDiffResponse
+)
+from src.core.document_processor import (
+    process_document_query, delete_document_data, diff_versions, get_answer_cache, summarize_file
+)
+from src.api.admission import AdmissionController, Overloaded
+from src.llm.ask_gemini import LLMRateLimitError
+from src.core.catalog import (
+    register_document, get_document, get_next_version, get_persist_dir, get_upload_dir
+)
 
 # Configure logging
 log_level = os.environ.get("LOG_LEVEL", "INFO")
@@ -35,13 +46,16 @@ app.add_middleware(
 )
 
 # Use environment variable for upload directory in production
-UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "data/raw")
+UPLOAD_DIR = get_upload_dir()
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # Global variables for caching
 _embedder_cache = None
 _db_client_cache = None
 
+# Bounds concurrent LLM-bound queries per worker; see src/api/admission.py
+admission = AdmissionController.from_env()
+
 @app.get("/")
 def read_root():
     """Root endpoint - API health check"""
@@ -100,8 +114,12 @@ def health_check():
     return health_status
 
 @app.post("/upload/", response_model=UploadResponse)
-async def upload_document(file: UploadFile = File(...)):
-    """Upload a legal document for processing"""
+async def upload_document(file: UploadFile = File(...), previous_version: Optional[str] = Form(None)):
+    """
+    Upload a legal document for processing.
+    Pass previous_version (an uploaded filename) to upload a revision of that
+    document; only the chunks that changed are re-embedded.
+    """
     try:
         # Validate file type
         allowed_extensions = [".pdf", ".docx"]
@@ -112,6 +130,13 @@ async def upload_document(file: UploadFile = File(...)):
                 status_code=400, 
                 detail=f"Unsupported file format. Allowed formats: {', '.join(allowed_extensions)}"
             )
+        
+        if previous_version:
+            if not os.path.exists(os.path.join(UPLOAD_DIR, previous_version)):
+                raise HTTPException(status_code=404, detail="Previous version not found.")
+            if await run_in_threadpool(get_next_version, previous_version):
+                raise HTTPException(status_code=409, detail="Previous version already has a newer revision.")
+            await run_in_threadpool(register_document, previous_version)  # no-op unless uploaded before the catalog existed
 
         # Generate unique filename
         unique_filename = f"{uuid.uuid4()}_{file.filename}"
@@ -123,6 +148,7 @@ async def upload_document(file: UploadFile = File(...)):
 
         # Get file size
         file_size = os.path.getsize(file_path)
+        entry = await run_in_threadpool(register_document, unique_filename, previous_version=previous_version)
 
         logger.info(f"File uploaded successfully: {unique_filename} ({file_size} bytes)")
 
@@ -130,7 +156,9 @@ async def upload_document(file: UploadFile = File(...)):
             message="File uploaded successfully.",
             filename=unique_filename,
             file_size=file_size,
-            document_type=file_extension[1:]  # Remove the dot
+            document_type=file_extension[1:],  # Remove the dot
+            version=entry["version"],
+            previous_version=entry["previous_version"]
         )
 
     except HTTPException:
@@ -139,9 +167,28 @@ async def upload_document(file: UploadFile = File(...)):
         logger.error(f"Error uploading file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
+@app.get("/metrics")
+def get_metrics():
+    """Admission queue and answer cache statistics for this worker"""
+    return {
+        "admission": admission.metrics(),
+        "answer_cache": get_answer_cache().stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/ask/", response_model=QueryResponse)
-def ask_question(request: QueryRequest):
-    """Ask a question about an uploaded document"""
+async def ask_question(
+    request: QueryRequest,
+    http_request: Request,
+    x_client_id: Optional[str] = Header(None),
+    x_request_priority: Optional[str] = Header(None)
+):
+    """
+    Ask a question about an uploaded document.
+    Batch jobs should send `X-Request-Priority: batch` so interactive users are
+    served first, and an `X-Client-ID` to be queued fairly against other clients.
+    """
+    client_id = x_client_id or (http_request.client.host if http_request.client else "anonymous")
     try:
         file_path = os.path.join(UPLOAD_DIR, request.filename)
 
@@ -149,11 +196,20 @@ def ask_question(request: QueryRequest):
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found.")
 
-        # Process the query
-        logger.info(f"Processing query for file: {request.filename}")
-        logger.info(f"Question: {request.question}")
+        # Revisions share one vector collection, which always holds the latest version
+        next_version = await run_in_threadpool(get_next_version, request.filename)
+        if next_version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Document has been superseded by {next_version}; ask the latest version instead."
+            )
 
-        answer = process_document_query(file_path, request.question)
+        # Process the query once admitted; waiting happens on the event loop, not in the threadpool
+        async with admission.slot(client_id, x_request_priority or "interactive"):
+            logger.info(f"Processing query for file: {request.filename}")
+            logger.info(f"Question: {request.question}")
+
+            answer = await run_in_threadpool(process_document_query, file_path, request.question)
 
         return QueryResponse(
             answer=answer,
@@ -163,6 +219,21 @@ def ask_question(request: QueryRequest):
 
     except HTTPException:
         raise
+    except Overloaded as e:
+        logger.warning(f"Shedding query from {client_id}: {e.reason}")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy ({e.reason}), retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except LLMRateLimitError as e:
+        admission.note_rate_limited(e.retry_after)
+        logger.warning(f"LLM rate limit hit, retry after {e.retry_after}s")
+        raise HTTPException(
+            status_code=429,
+            detail="LLM rate limit reached, retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
@@ -225,6 +296,71 @@ def get_document_content(filename: str):
         logger.error(f"Error retrieving document content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving document content: {str(e)}")
 
+@app.get("/documents/{filename}/summary")
+async def get_document_summary(
+    filename: str,
+    http_request: Request,
+    x_client_id: Optional[str] = Header(None),
+    x_request_priority: Optional[str] = Header(None)
+):
+    """Summarize the whole document (map-reduce over all chunks; cached per version)"""
+    client_id = x_client_id or (http_request.client.host if http_request.client else "anonymous")
+    try:
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File not found.")
+        
+        async with admission.slot(client_id, x_request_priority or "interactive"):
+            summary = await run_in_threadpool(summarize_file, file_path)
+        
+        return {"filename": filename, "summary": summary}
+
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy ({e.reason}), retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except LLMRateLimitError as e:
+        admission.note_rate_limited(e.retry_after)
+        raise HTTPException(
+            status_code=429,
+            detail="LLM rate limit reached, retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Error summarizing document: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error summarizing document: {str(e)}")
+
+@app.get("/documents/{filename}/changes", response_model=VersionDiffResponse)
+def get_document_changes(filename: str, against: Optional[str] = None):
+    """List the clauses that changed since the previous version (or the version given in `against`)"""
+    try:
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File not found.")
+        
+        entry = get_document(filename)
+        previous = against or (entry["previous_version"] if entry else None)
+        if not previous:
+            raise HTTPException(status_code=400, detail="Document has no previous version to compare against.")
+        
+        previous_path = os.path.join(UPLOAD_DIR, previous)
+        if not os.path.exists(previous_path):
+            raise HTTPException(status_code=404, detail="Previous version not found.")
+        
+        return VersionDiffResponse(**diff_versions(filename, file_path, previous, previous_path))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error comparing document versions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error comparing document versions: {str(e)}")
+
 @app.delete("/documents/{filename}")
 def delete_document(filename: str):
     """Delete an uploaded document"""
@@ -235,9 +371,10 @@ def delete_document(filename: str):
             raise HTTPException(status_code=404, detail="File not found.")
         
         os.remove(file_path)
+        removed = delete_document_data(filename)
         logger.info(f"Document deleted: {filename}")
         
-        return {"message": f"Document {filename} deleted successfully."}
+        return {"message": f"Document {filename} deleted successfully.", "removed": removed}
 
     except HTTPException:
         raise
@@ -253,7 +390,8 @@ async def http_exception_handler(request, exc):
         content=ErrorResponse(
             error=exc.detail,
             code=str(exc.status_code)
-        ).dict()
+        ).dict(),
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -283,8 +421,7 @@ async def startup_event():
         
         # Pre-initialize vector DB
         from src.vector_store import init_chroma_db
-        persist_dir = os.environ.get("VECTOR_DB_PERSIST_DIR", "vector_db")
-        _db_client_cache = init_chroma_db(persist_directory=persist_dir)
+        _db_client_cache = init_chroma_db(persist_directory=get_persist_dir())
         logger.info("Vector database initialized successfully")
         
     except Exception as e:
@@ -16,6 +16,8 @@ class UploadResponse(BaseModel):
     filename: str
     file_size: Optional[int] = None
     document_type: Optional[str] = None
+    version: Optional[int] = None
+    previous_version: Optional[str] = None
 
 class DocumentInfo(BaseModel):
     filename: str
@@ -25,6 +27,16 @@ class DocumentInfo(BaseModel):
     document_type: str
     status: str  # "processing", "ready", "error"
 
+class VersionDiffResponse(BaseModel):
+    filename: str
+    previous_version: str
+    added: List[str]  # section paths only in the new version
+    removed: List[str]  # section paths only in the previous version
+    modified: List[str]  # section paths whose text changed
+    chunks_changed: int
+    chunks_removed: int
+    chunks_unchanged: int
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
@@ -0,0 +1,166 @@
+"""
+Preload-and-fork server entry point.
+
+`uvicorn --workers N` starts N independent interpreters, each loading its own
+copy of the MiniLM embedder, so memory grows linearly with workers. This
+entry point loads the app and the embedder once in a parent process, freezes
+the heap, binds the listening socket and then forks the workers. Workers
+share the model weights copy-on-write and accept connections on the shared
+socket; per-process resources (Chroma client, SQLite handles) are still
+created in each worker by the app's startup event.
+
+    python -m src.api.server --workers 4 --threads-per-worker 2
+
+Set FORWARDED_ALLOW_IPS to the proxy's address (or "*" when the app is only
+reachable through the proxy) so client addresses come from X-Forwarded-For.
+"""
+
+import os
+import sys
+import gc
+import time
+import signal
+import socket
+import argparse
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+logger = logging.getLogger("src.api.server")
+
+
+def _limit_threads(threads: int):
+    """Cap BLAS/OpenMP/torch threads so N workers do not oversubscribe the CPUs"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def preload():
+    """
+    Import the app and load the embedder in the parent. Runs single-threaded so
+    no OpenMP thread pool exists at fork time (GNU OpenMP pools do not survive fork).
+    """
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    _limit_threads(1)
+
+    from src.api.main import app
+    from src.core.document_processor import get_embedder
+
+    embedder = get_embedder()
+    embedder.eval()
+    for parameter in embedder.parameters():
+        parameter.requires_grad_(False)
+    embedder.encode(["warm-up"])  # initialize lazy buffers before forking
+
+    # Move everything allocated so far out of the GC's reach; otherwise the
+    # first collection in each worker touches (and copies) every object page
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, threads: int, log_level: str):
+    import uvicorn
+
+    _limit_threads(threads)
+    # Behind a reverse proxy (e.g. Render's) every peer address is the proxy's; trusting
+    # its X-Forwarded-For lets /ask/ queue anonymous clients by their own address
+    config = uvicorn.Config(
+        app, log_level=log_level.lower(), timeout_keep_alive=5, proxy_headers=True,
+        forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+    )
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int, threads_per_worker: int, log_level: str = "INFO"):
+    app = preload()
+    sock = _bind(host, port)
+    logger.info(f"Preloaded app; forking {workers} workers with {threads_per_worker} threads each")
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Worker: default signal handling, uvicorn installs its own
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                _run_worker(app, sock, threads_per_worker, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        spawn()
+
+    # Supervise: replace workers that die unexpectedly
+    while children:
+        try:
+            pid, status = os.wait()
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started < 1:
+            time.sleep(1)  # avoid a tight crash loop
+        spawn()
+
+    sock.close()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Serve the API with workers forked from a preloaded parent")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)))
+    parser.add_argument(
+        "--threads-per-worker", type=int, default=int(os.environ.get("WORKER_THREADS", 0)),
+        help="Torch/BLAS threads per worker (default: CPUs divided by workers)"
+    )
+    args = parser.parse_args()
+    threads = args.threads_per_worker or max(1, cpus // args.workers)
+
+    logging.basicConfig(
+        level=getattr(logging, os.environ.get("LOG_LEVEL", "INFO")),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    serve(args.host, args.port, args.workers, threads, os.environ.get("LOG_LEVEL", "INFO"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Semantic answer cache.
+
+Paraphrased questions about the same document version ("who signed this?",
+"which parties are bound?") map to nearby MiniLM embeddings. The cache keeps
+the embeddings of answered questions per document and returns the stored
+answer when a new question's cosine similarity clears a threshold.
+
+Hits are appended to an audit log (JSON lines) together with the matched
+question and score so the threshold can be tuned. A configurable fraction of
+hits is also re-answered by the LLM and logged side by side, which gives a
+direct sample of false hits.
+"""
+
+import os
+import json
+import random
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _DocumentEntries:
+    """Question embeddings and answers for one document version, grown on demand up to max_entries"""
+
+    _INITIAL_CAPACITY = 8
+
+    def __init__(self, dim: int, max_entries: int):
+        capacity = min(self._INITIAL_CAPACITY, max_entries)
+        self.max_entries = max_entries
+        self.embeddings = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.questions = []
+        self.answers = []
+        self.size = 0
+
+    def next_slot(self) -> Optional[int]:
+        """Append a slot, doubling the arrays when full; None once max_entries are held"""
+        if self.size >= self.max_entries:
+            return None
+        capacity = self.embeddings.shape[0]
+        if self.size == capacity:
+            capacity = min(capacity * 2, self.max_entries)
+            embeddings = np.zeros((capacity, self.embeddings.shape[1]), dtype=np.float32)
+            embeddings[:self.size] = self.embeddings
+            last_used = np.zeros(capacity, dtype=np.int64)
+            last_used[:self.size] = self.last_used
+            self.embeddings, self.last_used = embeddings, last_used
+        self.questions.append(None)
+        self.answers.append(None)
+        self.size += 1
+        return self.size - 1
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe, in-process semantic cache keyed by document filename.
+
+    Args:
+        threshold (float): Minimum cosine similarity for a hit
+        max_entries (int): Questions kept per document (least recently used evicted)
+        max_documents (int): Documents kept (least recently used evicted)
+        audit_log (str): JSON-lines file receiving hit and verification records
+        audit_sample (float): Fraction of hits re-answered to measure false hits
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 256, max_documents: int = 128,
+                 audit_log: Optional[str] = None, audit_sample: float = 0.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_documents = max_documents
+        self.audit_log = audit_log
+        self.audit_sample = audit_sample
+
+        self._documents: "OrderedDict[str, _DocumentEntries]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._audited = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticAnswerCache":
+        return cls(
+            threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.92")),
+            max_entries=int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "256")),
+            max_documents=int(os.environ.get("ANSWER_CACHE_MAX_DOCUMENTS", "128")),
+            audit_log=os.environ.get("ANSWER_CACHE_AUDIT_LOG", "data/answer_cache_audit.jsonl"),
+            audit_sample=float(os.environ.get("ANSWER_CACHE_AUDIT_SAMPLE", "0")),
+        )
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, filename: str, question: str, embedding) -> Optional[dict]:
+        """
+        Return {"answer", "question", "score", "verify"} for the closest cached
+        question above the threshold, or None on a miss. When ``verify`` is True
+        the caller should answer afresh and pass both answers to ``audit``.
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            entries = self._documents.get(filename)
+            if entries is None or entries.size == 0:
+                self._misses += 1
+                return None
+
+            self._documents.move_to_end(filename)
+            scores = entries.embeddings[:entries.size] @ query
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._clock += 1
+            entries.last_used[best] = self._clock
+            hit = {
+                "answer": entries.answers[best],
+                "question": entries.questions[best],
+                "score": score,
+                "verify": random.random() < self.audit_sample,
+            }
+
+        self._write_audit({
+            "event": "hit",
+            "filename": filename,
+            "question": question,
+            "matched_question": hit["question"],
+            "score": round(score, 4),
+        })
+        return hit
+
+    def store(self, filename: str, question: str, embedding, answer: str):
+        """Cache an answer, evicting the least recently used question if full"""
+        vector = self._normalize(embedding)
+        with self._lock:
+            entries = self._documents.get(filename)
+            if entries is None:
+                if len(self._documents) >= self.max_documents:
+                    self._documents.popitem(last=False)
+                    self._evictions += 1
+                entries = _DocumentEntries(vector.shape[0], self.max_entries)
+                self._documents[filename] = entries
+            self._documents.move_to_end(filename)
+
+            slot = entries.next_slot()
+            if slot is None:
+                slot = int(np.argmin(entries.last_used[:entries.size]))
+                self._evictions += 1
+
+            self._clock += 1
+            entries.embeddings[slot] = vector
+            entries.questions[slot] = question
+            entries.answers[slot] = answer
+            entries.last_used[slot] = self._clock
+
+    def audit(self, filename: str, question: str, hit: dict, fresh_answer: str):
+        """Log a sampled hit next to a freshly generated answer for false-hit review"""
+        with self._lock:
+            self._audited += 1
+        self._write_audit({
+            "event": "verify",
+            "filename": filename,
+            "question": question,
+            "matched_question": hit["question"],
+            "score": round(hit["score"], 4),
+            "cached_answer": hit["answer"],
+            "fresh_answer": fresh_answer,
+            "same_answer": fresh_answer.strip() == hit["answer"].strip(),
+        })
+
+    def invalidate(self, filename: str):
+        """Forget all cached answers for a document"""
+        with self._lock:
+            self._documents.pop(filename, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "documents": len(self._documents),
+                "entries": sum(entries.size for entries in self._documents.values()),
+                "evictions": self._evictions,
+                "audited": self._audited,
+                "threshold": self.threshold,
+            }
+
+    def _write_audit(self, record: dict):
+        if not self.audit_log:
+            return
+        record["timestamp"] = datetime.now().isoformat()
+        try:
+            parent = os.path.dirname(self.audit_log)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(self.audit_log, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write answer cache audit log: {str(e)}")
@@ -0,0 +1,304 @@
+"""
+Document catalog that records which vector store collection and cache
+artifacts belong to each uploaded document.
+
+The catalog is the source of truth for deletes and for offline garbage
+collection of the vector store, so it lives in its own small SQLite file
+outside the Chroma persist directory.
+"""
+
+import os
+import sqlite3
+import hashlib
+import shutil
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def get_persist_dir() -> str:
+    """Directory used by the persistent Chroma client"""
+    return os.environ.get("VECTOR_DB_PERSIST_DIR", "vector_db")
+
+
+def get_upload_dir() -> str:
+    """Directory holding uploaded source documents"""
+    return os.environ.get("UPLOAD_DIR", "data/raw")
+
+
+def get_cache_root() -> str:
+    """Root directory for per-document cached artifacts"""
+    return os.environ.get("CACHE_DIR", "data/cache")
+
+
+def get_catalog_path() -> str:
+    """Path of the SQLite file backing the document catalog"""
+    return os.environ.get("CATALOG_PATH", "data/catalog.sqlite3")
+
+
+def get_collection_name(filename: str) -> str:
+    """
+    Deterministic collection name for an uploaded document.
+
+    Uses a stable digest rather than the builtin ``hash`` so the same file maps
+    to the same collection across restarts and across workers.
+    """
+    digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:16]
+    return f"doc_{digest}"
+
+
+def get_cache_dir(filename: str) -> str:
+    """Directory holding cached artifacts for a document"""
+    return os.path.join(get_cache_root(), get_collection_name(filename))
+
+
+# Catalog files whose schema this process has already created or migrated
+_prepared_paths: Set[str] = set()
+_prepare_lock = threading.Lock()
+
+
+def _connect(catalog_path: Optional[str] = None) -> sqlite3.Connection:
+    path = catalog_path or get_catalog_path()
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    key = os.path.abspath(path)
+    fresh = key not in _prepared_paths or not os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    if fresh:
+        with _prepare_lock:
+            _prepare_schema(conn)
+            _prepared_paths.add(key)
+    return conn
+
+
+def _add_column(conn: sqlite3.Connection, table: str, definition: str):
+    """ALTER TABLE ADD COLUMN that tolerates another process having added it first"""
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            raise
+
+
+def _prepare_schema(conn: sqlite3.Connection):
+    """Create the catalog tables and migrate older files (idempotent across processes)"""
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            filename TEXT PRIMARY KEY,
+            collection_name TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        -- Content-hashed chunk manifest of each document version
+        CREATE TABLE IF NOT EXISTS chunks (
+            filename TEXT NOT NULL,
+            chunk_id TEXT NOT NULL,
+            section_path TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (filename, chunk_id)
+        );
+        -- Which document version a (possibly shared) collection currently holds
+        CREATE TABLE IF NOT EXISTS collections (
+            collection_name TEXT PRIMARY KEY,
+            current_filename TEXT NOT NULL
+        );
+        """
+    )
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(documents)")}
+    if "previous_version" not in columns:
+        _add_column(conn, "documents", "previous_version TEXT")
+    if "version" not in columns:
+        _add_column(conn, "documents", "version INTEGER NOT NULL DEFAULT 1")
+    conn.commit()
+
+
+def register_document(filename: str, previous_version: Optional[str] = None,
+                      catalog_path: Optional[str] = None) -> dict:
+    """
+    Add a document to the catalog (no-op if it is already registered).
+
+    A document registered with ``previous_version`` joins that version's
+    lineage: it shares its collection, so re-ingestion only has to embed the
+    chunks that changed.
+
+    Returns:
+        dict: The catalog entry for the document
+    """
+    collection_name = get_collection_name(filename)
+    version = 1
+    if previous_version:
+        previous = get_document(previous_version, catalog_path)
+        if previous is None:
+            raise KeyError(f"Unknown previous version: {previous_version}")
+        collection_name = previous["collection_name"]
+        version = previous["version"] + 1
+
+    with _connect(catalog_path) as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO documents (filename, collection_name, created_at, previous_version, version) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (filename, collection_name, datetime.now().isoformat(), previous_version, version),
+        )
+    return get_document(filename, catalog_path)
+
+
+def get_document(filename: str, catalog_path: Optional[str] = None) -> Optional[dict]:
+    """Return the catalog entry for a document, or None if it is unknown"""
+    with _connect(catalog_path) as conn:
+        row = conn.execute("SELECT * FROM documents WHERE filename = ?", (filename,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_catalog(catalog_path: Optional[str] = None) -> List[dict]:
+    """Return every catalog entry"""
+    with _connect(catalog_path) as conn:
+        rows = conn.execute("SELECT * FROM documents ORDER BY created_at").fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_next_version(filename: str, catalog_path: Optional[str] = None) -> Optional[str]:
+    """Return the filename of the version that supersedes this one, if any"""
+    with _connect(catalog_path) as conn:
+        row = conn.execute(
+            "SELECT filename FROM documents WHERE previous_version = ?", (filename,)
+        ).fetchone()
+    return row["filename"] if row else None
+
+
+def collection_references(collection_name: str, catalog_path: Optional[str] = None) -> List[str]:
+    """Filenames of all catalogued versions stored in a collection"""
+    with _connect(catalog_path) as conn:
+        rows = conn.execute(
+            "SELECT filename FROM documents WHERE collection_name = ?", (collection_name,)
+        ).fetchall()
+    return [row["filename"] for row in rows]
+
+
+def get_manifest(filename: str, catalog_path: Optional[str] = None) -> Optional[List[dict]]:
+    """Return the chunk manifest of a document in position order, or None if not recorded"""
+    with _connect(catalog_path) as conn:
+        rows = conn.execute(
+            "SELECT chunk_id, section_path, position FROM chunks WHERE filename = ? ORDER BY position",
+            (filename,),
+        ).fetchall()
+    return [dict(row) for row in rows] or None
+
+
+def save_manifest(filename: str, manifest: List[dict], catalog_path: Optional[str] = None):
+    """Replace the chunk manifest recorded for a document"""
+    with _connect(catalog_path) as conn:
+        conn.execute("DELETE FROM chunks WHERE filename = ?", (filename,))
+        conn.executemany(
+            "INSERT INTO chunks (filename, chunk_id, section_path, position) VALUES (?, ?, ?, ?)",
+            [(filename, m["chunk_id"], m["section_path"], m["position"]) for m in manifest],
+        )
+
+
+def clear_manifest(filename: str, catalog_path: Optional[str] = None):
+    """Drop the chunk manifest recorded for a document, before appending a new one"""
+    with _connect(catalog_path) as conn:
+        conn.execute("DELETE FROM chunks WHERE filename = ?", (filename,))
+
+
+def append_manifest(filename: str, manifest: List[dict], catalog_path: Optional[str] = None):
+    """Add entries to a document's chunk manifest (streaming ingestion writes it batch by batch)"""
+    with _connect(catalog_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO chunks (filename, chunk_id, section_path, position) VALUES (?, ?, ?, ?)",
+            [(filename, m["chunk_id"], m["section_path"], m["position"]) for m in manifest],
+        )
+
+
+def count_chunk_digests(filename: str, digests: Iterable[str], catalog_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    How many manifest entries of a document carry each content digest, counting
+    repeats ("<digest>-2", "<digest>-3", ...). Digests with no entry are omitted.
+    """
+    counts = {}
+    with _connect(catalog_path) as conn:
+        for digest in set(digests):
+            # Ids are the fixed-length hex digest, optionally followed by "-<n>"; "." sorts right after "-"
+            row = conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE filename = ? AND chunk_id >= ? AND chunk_id < ?",
+                (filename, digest, f"{digest}."),
+            ).fetchone()
+            if row[0]:
+                counts[digest] = row[0]
+    return counts
+
+
+def known_chunk_ids(filename: str, chunk_ids: List[str], catalog_path: Optional[str] = None) -> Set[str]:
+    """The subset of chunk_ids that appear in a document's manifest"""
+    with _connect(catalog_path) as conn:
+        rows = conn.execute(
+            f"SELECT chunk_id FROM chunks WHERE filename = ? AND chunk_id IN ({', '.join('?' * len(chunk_ids))})",
+            (filename, *chunk_ids),
+        ).fetchall()
+    return {row["chunk_id"] for row in rows}
+
+
+def iter_manifest_difference(filename: str, other_filename: str, batch_size: int = 256,
+                             catalog_path: Optional[str] = None) -> Iterator[List[str]]:
+    """Chunk ids in the manifest of ``filename`` but not of ``other_filename``, in batches"""
+    with _connect(catalog_path) as conn:
+        cursor = conn.execute(
+            "SELECT chunk_id FROM chunks WHERE filename = ? "
+            "AND chunk_id NOT IN (SELECT chunk_id FROM chunks WHERE filename = ?)",
+            (filename, other_filename),
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [row["chunk_id"] for row in rows]
+
+
+def get_collection_state(collection_name: str, catalog_path: Optional[str] = None) -> Optional[str]:
+    """Filename of the version a collection currently holds, or None if never synced"""
+    with _connect(catalog_path) as conn:
+        row = conn.execute(
+            "SELECT current_filename FROM collections WHERE collection_name = ?", (collection_name,)
+        ).fetchone()
+    return row["current_filename"] if row else None
+
+
+def set_collection_state(collection_name: str, filename: str, catalog_path: Optional[str] = None):
+    """Record that a collection now holds the chunks of ``filename``"""
+    with _connect(catalog_path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO collections (collection_name, current_filename) VALUES (?, ?)",
+            (collection_name, filename),
+        )
+
+
+def remove_document(filename: str, catalog_path: Optional[str] = None) -> bool:
+    """
+    Drop a document, its chunk manifest and its collection state from the catalog.
+    Returns True if a document entry was removed.
+    """
+    with _connect(catalog_path) as conn:
+        row = conn.execute("SELECT previous_version FROM documents WHERE filename = ?", (filename,)).fetchone()
+        cursor = conn.execute("DELETE FROM documents WHERE filename = ?", (filename,))
+        conn.execute("DELETE FROM chunks WHERE filename = ?", (filename,))
+        conn.execute("DELETE FROM collections WHERE current_filename = ?", (filename,))
+        # The next version now follows whatever preceded the removed one
+        conn.execute(
+            "UPDATE documents SET previous_version = ? WHERE previous_version = ?",
+            (row["previous_version"] if row else None, filename),
+        )
+    return cursor.rowcount > 0
+
+
+def remove_cache_dir(filename: str) -> bool:
+    """Delete all cached artifacts for a document. Returns True if anything was removed."""
+    cache_dir = get_cache_dir(filename)
+    if not os.path.isdir(cache_dir):
+        return False
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    logger.info(f"Removed cache directory: {cache_dir}")
+    return True
@@ -5,19 +5,32 @@ for end-to-end document analysis and question answering.
 
 import os
 import sys
+import time
+import hashlib
 import logging
-from typing import List, Optional
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.parsers.document_loader import load_document
-from src.parsers.chunk_text import clean_text, chunk_text
-from src.vector_store import init_chroma_db, create_or_load_collection, store_chunks
+from src.parsers.document_loader import load_document, iter_document_text
+from src.parsers.chunk_text import clean_text, chunk_text, chunk_clauses, iter_fixed_chunks, iter_clauses
+from src.vector_store import init_chroma_db, create_or_load_collection, store_chunks, delete_collection
+from src.core.catalog import (
+    get_persist_dir, get_collection_name, get_cache_dir, register_document, remove_document, remove_cache_dir,
+    get_document, get_manifest, save_manifest, clear_manifest, append_manifest, count_chunk_digests,
+    known_chunk_ids, iter_manifest_difference, get_collection_state, set_collection_state,
+    collection_references
+)
+from src.core.answer_cache import SemanticAnswerCache
+from src.core.summarizer import MapReduceSummarizer
 from src.retriever import retrieve_relevant_chunks
-from src.llm.ask_gemini import ask_gemini
+from src.llm.ask_gemini import ask_gemini, generate_text, llm_configured, LLMRateLimitError
 from src.tools.tool_registry import TOOLS
 from sentence_transformers import SentenceTransformer
+import psutil
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,82 +52,363 @@ def get_embedder():
             raise
     return _embedder
 
-def process_document_query(file_path: str, question: str) -> str:
+# Global semantic answer cache (per worker process)
+_answer_cache = None
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get or create the global semantic answer cache"""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache.from_env()
+    return _answer_cache
+
+def build_chunks(text: str, strategy: Optional[str] = None):
     """
-    Main function to process a document and answer a question about it.
+    Split document text into chunks for the vector store.
     
     Args:
-        file_path (str): Path to the document file
-        question (str): Question to answer about the document
+        text (str): Raw extracted document text (line breaks intact)
+        strategy (str): "clause" for structure-aware chunks or "fixed" for
+            500-word windows; defaults to the CHUNKING_STRATEGY env variable
         
     Returns:
-        str: Answer to the question based on the document content
+        tuple: (chunk texts, per-chunk metadata dicts or None)
+    """
+    strategy = strategy or os.environ.get("CHUNKING_STRATEGY", "clause")
+    if strategy == "fixed":
+        return chunk_text(clean_text(text), max_chunk_size=500), None
+    
+    clauses = chunk_clauses(text)
+    texts = [clause["text"] for clause in clauses]
+    metadatas = [{k: v for k, v in clause.items() if k != "text"} for clause in clauses]
+    return texts, metadatas
+
+def compute_chunk_ids(chunks: List[str], metadatas: Optional[List[dict]] = None) -> List[str]:
+    """
+    Content-addressed ids: a chunk keeps its id across versions as long as its
+    text and section are unchanged. Repeated identical chunks get a suffix.
+    """
+    seen = {}
+    return [
+        _chunk_id(chunk, metadatas[i].get("section_path", "") if metadatas else "", seen)
+        for i, chunk in enumerate(chunks)
+    ]
+
+def _chunk_digest(chunk: str, section_path: str) -> str:
+    return hashlib.sha1(f"{section_path}\x00{chunk}".encode("utf-8")).hexdigest()[:20]
+
+def _number_repeat(digest: str, seen: dict) -> str:
+    seen[digest] = seen.get(digest, 0) + 1
+    return digest if seen[digest] == 1 else f"{digest}-{seen[digest]}"
+
+def _chunk_id(chunk: str, section_path: str, seen: dict) -> str:
+    return _number_repeat(_chunk_digest(chunk, section_path), seen)
+
+def build_manifest(chunk_ids: List[str], metadatas: Optional[List[dict]] = None) -> List[dict]:
+    """Chunk manifest recorded in the catalog for version diffs"""
+    return [
+        {
+            'chunk_id': chunk_id,
+            'section_path': metadatas[i].get("section_path", "") if metadatas else "",
+            'position': i,
+        }
+        for i, chunk_id in enumerate(chunk_ids)
+    ]
+
+def ingest_chunks(filename: str, chunks: List[str], metadatas: Optional[List[dict]], collection,
+                  embedder=None) -> dict:
+    """
+    Bring a collection in line with one document version, embedding only what changed.
+    
+    Chunks whose content hash is already in the collection (e.g. from the
+    previous version of a redlined contract) are reused; new ones are embedded
+    and added, and ones that disappeared are deleted.
+    
+    Returns:
+        dict: Counts of embedded, reused and deleted chunks
+    """
+    chunk_ids = compute_chunk_ids(chunks, metadatas)
+    if get_collection_state(collection.name) == filename and collection.count() > 0:
+        logger.info(f"Document already processed - using existing {collection.count()} chunks")
+        return {'embedded': 0, 'reused': len(chunk_ids), 'deleted': 0}
+    
+    existing = collection.get(include=["metadatas"])
+    existing_metadata = dict(zip(existing["ids"], existing["metadatas"] or [None] * len(existing["ids"])))
+    wanted = set(chunk_ids)
+    
+    new_indices = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id not in existing_metadata]
+    stale_ids = [chunk_id for chunk_id in existing_metadata if chunk_id not in wanted]
+    
+    if new_indices:
+        store_chunks(
+            [chunks[i] for i in new_indices], collection, embedder=embedder,
+            metadatas=[metadatas[i] for i in new_indices] if metadatas else None,
+            ids=[chunk_ids[i] for i in new_indices]
+        )
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+    
+    # Reused chunks may have moved (position); fix metadata without re-embedding
+    if metadatas:
+        moved = [
+            i for i, chunk_id in enumerate(chunk_ids)
+            if chunk_id in existing_metadata and existing_metadata[chunk_id] != metadatas[i]
+        ]
+        if moved:
+            collection.update(ids=[chunk_ids[i] for i in moved], metadatas=[metadatas[i] for i in moved])
+    
+    save_manifest(filename, build_manifest(chunk_ids, metadatas))
+    set_collection_state(collection.name, filename)
+    
+    stats = {
+        'embedded': len(new_indices),
+        'reused': len(chunk_ids) - len(new_indices),
+        'deleted': len(stale_ids),
+    }
+    logger.info(f"Ingested {filename}: {stats}")
+    return stats
+
+def use_streaming_ingest(file_path: str) -> bool:
+    """
+    Whether to ingest a file in streaming mode: STREAMING_INGEST=true/false,
+    or "auto" (default) for files of at least STREAMING_INGEST_MIN_BYTES (5 MB).
+    """
+    mode = os.environ.get("STREAMING_INGEST", "auto").lower()
+    if mode == "auto":
+        return os.path.getsize(file_path) >= int(os.environ.get("STREAMING_INGEST_MIN_BYTES", str(5 * 2**20)))
+    return mode == "true"
+
+def iter_document_chunks(file_path: str, strategy: Optional[str] = None) -> Iterator[Tuple[str, Optional[dict]]]:
+    """
+    Streaming build_chunks: read the document a page at a time and yield
+    (chunk text, metadata or None) without holding the whole text.
+    """
+    strategy = strategy or os.environ.get("CHUNKING_STRATEGY", "clause")
+    lines = (line for page in iter_document_text(file_path) for line in page.splitlines())
+    if strategy == "fixed":
+        for chunk in iter_fixed_chunks(lines, max_chunk_size=500):
+            yield chunk, None
+        return
+
+    for clause in iter_clauses(lines):
+        yield clause["text"], {k: v for k, v in clause.items() if k != "text"}
+
+class RssSampler(threading.Thread):
+    """Track the peak RSS of this process in the background"""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self._stopped.set()
+        self.join()
+        return self.peak
+
+def ingest_document_stream(filename: str, file_path: str, collection, embedder=None,
+                           embed_batch_size: Optional[int] = None, store_batch_size: Optional[int] = None) -> dict:
+    """
+    Streaming counterpart of ingest_chunks for very large documents.
+    
+    Pages flow through the chunker into batches of store_batch_size chunks
+    (STREAMING_STORE_BATCH, default 256); each batch is checked against the
+    collection, its new chunks embedded in micro-batches of embed_batch_size
+    (STREAMING_EMBED_BATCH, default 32), written, and its manifest rows added
+    to the catalog before the next batch is read. Chunk id repeats and stale
+    chunks are worked out in the catalog, so memory is bounded by the batch
+    sizes, not the document length.
+    
+    Returns:
+        dict: Counts of chunks, embedded, reused and deleted chunks, plus the
+        peak RSS of this process while the document was ingested
     """
+    held_version = get_collection_state(collection.name)
+    if held_version == filename and collection.count() > 0:
+        logger.info(f"Document already processed - using existing {collection.count()} chunks")
+        reused = len(get_manifest(filename) or [])
+        return {'chunks': reused, 'embedded': 0, 'reused': reused, 'deleted': 0}
+    
+    embedder = embedder or get_embedder()
+    embed_batch_size = embed_batch_size or int(os.environ.get("STREAMING_EMBED_BATCH", "32"))
+    store_batch_size = store_batch_size or int(os.environ.get("STREAMING_STORE_BATCH", "256"))
+    # Sampled in the background: encode's activations are freed before it returns
+    sampler = RssSampler()
+    start_rss = sampler.peak
+    sampler.start()
+    
+    had_chunks = collection.count() > 0
+    clear_manifest(filename)
+    position = 0
+    embedded = 0
     try:
-        logger.info(f"Processing document: {file_path}")
-        logger.info(f"Question: {question}")
-        
-        # Step 1: Load and extract text from document
-        logger.info("Step 1: Loading document...")
-        text = load_document(file_path)
-        
-        if not text or len(text.strip()) == 0:
-            return "Error: Could not extract text from the document or document is empty."
-        
-        logger.info(f"Extracted {len(text)} characters from document")
-        
-        # Step 2: Clean and chunk the text
-        logger.info("Step 2: Cleaning and chunking text...")
-        cleaned_text = clean_text(text)
-        chunks = chunk_text(cleaned_text, max_chunk_size=500)
-        
-        if not chunks:
-            return "Error: Could not create chunks from the document text."
-            
-        logger.info(f"Created {len(chunks)} chunks")
-        
-        # Step 3: Initialize vector database
-        logger.info("Step 3: Initializing vector database...")
-        persist_dir = os.environ.get("VECTOR_DB_PERSIST_DIR", "vector_db")
-        db_client = init_chroma_db(persist_directory=persist_dir)
-        
-        # Create collection name based on file
-        filename = os.path.basename(file_path)
-        collection_name = f"doc_{hash(filename) % 1000000}"  # Simple hash for unique collection
-        collection = create_or_load_collection(db_client, collection_name=collection_name)
+        chunks = iter_document_chunks(file_path)
+        while True:
+            batch = list(islice(chunks, store_batch_size))
+            if not batch:
+                break
+            texts = [text for text, _ in batch]
+            metadatas = [metadata for _, metadata in batch] if batch[0][1] is not None else None
+            # Repeats of a chunk in earlier batches are already in the catalog
+            digests = [_chunk_digest(text, metadata.get("section_path", "") if metadata else "") for text, metadata in batch]
+            seen = count_chunk_digests(filename, digests)
+            ids = [_number_repeat(digest, seen) for digest in digests]
         
-        # Step 4: Store chunks in vector database (if not already stored)
-        logger.info("Step 4: Storing chunks in vector database...")
-        try:
-            embedder = get_embedder()
-            
-            # Check if collection is empty (new document)
-            existing_count = collection.count()
-            if existing_count == 0:
-                logger.info(f"New document - storing {len(chunks)} chunks...")
-                store_chunks(chunks, collection, embedder=embedder)
-            else:
-                logger.info(f"Document already processed - using existing {existing_count} chunks")
-        except Exception as e:
-            logger.error(f"Error in vector database operations: {str(e)}")
-            # Try to continue with a simplified approach
-            embedder = get_embedder()
-            store_chunks(chunks, collection, embedder=embedder)
-        
-        # Step 5: Retrieve relevant chunks for the question
-        logger.info("Step 5: Retrieving relevant chunks...")
-        top_chunks = retrieve_relevant_chunks(question, collection, embedder=embedder, top_k=5)
-        
-        if not top_chunks:
-            return "Error: Could not find relevant information in the document for your question."
-        
-        logger.info(f"Retrieved {len(top_chunks)} relevant chunks")
-        
-        # Step 6: Build context and generate LLM prompt
-        logger.info("Step 6: Generating answer using LLM...")
-        context = "\n\n".join(top_chunks)
+            existing = collection.get(ids=ids, include=["metadatas"])
+            existing_metadata = dict(zip(existing["ids"], existing["metadatas"] or [None] * len(existing["ids"])))
+            new_indices = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_metadata]
+            if new_indices:
+                embeddings = embedder.encode([texts[i] for i in new_indices], batch_size=embed_batch_size)
+                collection.add(
+                    documents=[texts[i] for i in new_indices],
+                    embeddings=[embedding.tolist() for embedding in embeddings],
+                    ids=[ids[i] for i in new_indices],
+                    metadatas=[metadatas[i] for i in new_indices] if metadatas else None
+                )
+                embedded += len(new_indices)
+            if metadatas:
+                moved = [
+                    i for i, chunk_id in enumerate(ids)
+                    if chunk_id in existing_metadata and existing_metadata[chunk_id] != metadatas[i]
+                ]
+                if moved:
+                    collection.update(ids=[ids[i] for i in moved], metadatas=[metadatas[i] for i in moved])
         
-        llm_prompt = f"""
+            manifest = build_manifest(ids, metadatas)
+            for entry in manifest:
+                entry['position'] += position
+            append_manifest(filename, manifest)
+            position += len(batch)
+    except Exception:
+        # Never leave a partial manifest behind for version diffs
+        clear_manifest(filename)
+        raise
+    finally:
+        peak_rss = sampler.stop()
+    
+    stats = {
+        'chunks': position,
+        'embedded': embedded,
+        'reused': position - embedded,
+        'deleted': 0,
+        'peak_rss_mb': round(peak_rss / 2**20, 1),
+        'rss_growth_mb': round((peak_rss - start_rss) / 2**20, 1),
+    }
+    if not position:
+        logger.warning(f"No chunks extracted from {filename}")
+        return stats
+    
+    stale_batches = []
+    if held_version and held_version != filename:
+        # The collection holds exactly the previous version's manifest
+        stale_batches = iter_manifest_difference(held_version, filename, batch_size=store_batch_size)
+    elif had_chunks:
+        stale_batches = _iter_unlisted_ids(collection, filename, store_batch_size)
+    for stale_ids in stale_batches:
+        collection.delete(ids=stale_ids)
+        stats['deleted'] += len(stale_ids)
+    
+    set_collection_state(collection.name, filename)
+    logger.info(f"Streamed {filename}: {stats}")
+    return stats
+
+def _iter_unlisted_ids(collection, filename: str, page_size: int) -> Iterator[List[str]]:
+    """
+    Ids in a collection that are not in the document's manifest, for
+    collections whose previous contents were never recorded. Pages through
+    the collection; the stale ids are only deleted once the scan is done.
+    """
+    unlisted = []
+    offset = 0
+    while True:
+        ids = collection.get(include=[], limit=page_size, offset=offset)["ids"]
+        if not ids:
+            break
+        known = known_chunk_ids(filename, ids)
+        unlisted.extend(chunk_id for chunk_id in ids if chunk_id not in known)
+        offset += len(ids)
+    for start in range(0, len(unlisted), page_size):
+        yield unlisted[start:start + page_size]
+
+def get_version_manifest(filename: str, file_path: str) -> List[dict]:
+    """Chunk manifest of a version, computed from the file if it was never ingested"""
+    manifest = get_manifest(filename)
+    if manifest is None:
+        chunks, metadatas = build_chunks(load_document(file_path))
+        manifest = build_manifest(compute_chunk_ids(chunks, metadatas), metadatas)
+        save_manifest(filename, manifest)
+    return manifest
+
+def diff_versions(filename: str, file_path: str, previous_filename: str, previous_path: str) -> dict:
+    """
+    Report which clauses changed between two versions of a document.
+    
+    Clauses are compared by section path; a clause is modified when the
+    content hashes of its chunks differ.
+    
+    Returns:
+        dict: Added, removed and modified section paths plus chunk counts
+    """
+    def by_section(manifest):
+        sections = {}
+        for entry in manifest:
+            sections.setdefault(entry['section_path'], set()).add(entry['chunk_id'])
+        return sections
+    
+    new_manifest = get_version_manifest(filename, file_path)
+    old_manifest = get_version_manifest(previous_filename, previous_path)
+    new_sections = by_section(new_manifest)
+    old_sections = by_section(old_manifest)
+    new_ids = {entry['chunk_id'] for entry in new_manifest}
+    old_ids = {entry['chunk_id'] for entry in old_manifest}
+    
+    return {
+        'filename': filename,
+        'previous_version': previous_filename,
+        'added': [path for path in new_sections if path not in old_sections],
+        'removed': [path for path in old_sections if path not in new_sections],
+        'modified': [
+            path for path in new_sections
+            if path in old_sections and new_sections[path] != old_sections[path]
+        ],
+        'chunks_changed': len(new_ids - old_ids),
+        'chunks_removed': len(old_ids - new_ids),
+        'chunks_unchanged': len(new_ids & old_ids),
+    }
+
+def summarize_chunks(filename: str, chunks: Iterable[str]) -> str:
+    """
+    Map-reduce summary over every chunk of a document version (a list or a
+    generator). Partial and final summaries are cached in the document's cache
+    directory; without a GOOGLE_API_KEY an extractive summary is produced locally.
+    """
+    summarizer = MapReduceSummarizer.from_env(
+        cache_dir=get_cache_dir(filename),
+        llm=generate_text if llm_configured() else None
+    )
+    return summarizer.summarize(chunks)
+
+def summarize_file(file_path: str) -> str:
+    """Load, chunk and summarize a document"""
+    if use_streaming_ingest(file_path):
+        chunks = (text for text, _ in iter_document_chunks(file_path))
+        return summarize_chunks(os.path.basename(file_path), chunks)
+    text = load_document(file_path)
+    if not text or len(text.strip()) == 0:
+        return "Error: Could not extract text from the document or document is empty."
+    chunks, _ = build_chunks(text)
+    return summarize_chunks(os.path.basename(file_path), chunks)
+
+def build_prompt(context: str, question: str) -> str:
+    """Build the tool-aware legal assistant prompt for a question and its context"""
+    return f"""
 You are a legal assistant AI helping a user understand a legal document.
 
 You have access to external tools to assist with specific types of questions.
@@ -157,12 +451,117 @@ QUESTION:
 
 ANSWER:"""
 
+def process_document_query(file_path: str, question: str, top_k: Optional[int] = None,
+                           expand_parent: Optional[bool] = None, use_cache: bool = True) -> str:
+    """
+    Main function to process a document and answer a question about it.
+    
+    Args:
+        file_path (str): Path to the document file
+        question (str): Question to answer about the document
+        top_k (int): Number of chunks to retrieve (RETRIEVAL_TOP_K env, default 5)
+        expand_parent (bool): Retrieve a matched clause's whole parent section
+            (EXPAND_PARENT_SECTIONS env, default off)
+        use_cache (bool): Answer paraphrases of earlier questions from the
+            semantic answer cache
+        
+    Returns:
+        str: Answer to the question based on the document content
+    """
+    try:
+        logger.info(f"Processing document: {file_path}")
+        logger.info(f"Question: {question}")
+        
+        # Step 0: Check the semantic answer cache for a paraphrase of this question
+        filename = os.path.basename(file_path)
+        embedder = get_embedder()
+        question_embedding = embedder.encode(question)
+        cache_hit = get_answer_cache().lookup(filename, question, question_embedding) if use_cache else None
+        if cache_hit and not cache_hit["verify"]:
+            logger.info(f"Answer cache hit (score {cache_hit['score']:.3f}): {cache_hit['question']}")
+            return cache_hit["answer"]
+        
+        # Large documents are streamed page by page in Step 4 instead
+        streaming = use_streaming_ingest(file_path)
+        if not streaming:
+            # Step 1: Load and extract text from document
+            logger.info("Step 1: Loading document...")
+            text = load_document(file_path)
+            
+            if not text or len(text.strip()) == 0:
+                return "Error: Could not extract text from the document or document is empty."
+            
+            logger.info(f"Extracted {len(text)} characters from document")
+            
+            # Step 2: Clean and chunk the text
+            logger.info("Step 2: Cleaning and chunking text...")
+            chunks, chunk_metadatas = build_chunks(text)
+            
+            if not chunks:
+                return "Error: Could not create chunks from the document text."
+                
+            logger.info(f"Created {len(chunks)} chunks")
+        
+        # Step 3: Initialize vector database
+        logger.info("Step 3: Initializing vector database...")
+        db_client = init_chroma_db(persist_directory=get_persist_dir())
+        
+        # Create collection name based on file
+        collection_name = register_document(filename)["collection_name"]
+        collection = create_or_load_collection(db_client, collection_name=collection_name)
+        
+        # Step 4: Store chunks in vector database (only those not already stored)
+        if streaming:
+            logger.info("Step 4: Streaming document into vector database...")
+            if not ingest_document_stream(filename, file_path, collection, embedder=embedder)['chunks']:
+                return "Error: Could not extract text from the document or document is empty."
+        else:
+            logger.info("Step 4: Storing chunks in vector database...")
+            ingest_chunks(filename, chunks, chunk_metadatas, collection, embedder=embedder)
+        
+        # Step 5: Retrieve relevant chunks for the question
+        logger.info("Step 5: Retrieving relevant chunks...")
+        if top_k is None:
+            top_k = int(os.environ.get("RETRIEVAL_TOP_K", "5"))
+        if expand_parent is None:
+            expand_parent = os.environ.get("EXPAND_PARENT_SECTIONS", "false").lower() == "true"
+        top_chunks = retrieve_relevant_chunks(
+            question, collection, embedder=embedder, top_k=top_k, expand_parent=expand_parent,
+            query_embedding=question_embedding
+        )
+        
+        if not top_chunks:
+            return "Error: Could not find relevant information in the document for your question."
+        
+        logger.info(f"Retrieved {len(top_chunks)} relevant chunks")
+        
+        # Step 6: Build context and generate LLM prompt
+        logger.info("Step 6: Generating answer using LLM...")
+        context = "\n\n".join(top_chunks)
+        
+        llm_prompt = build_prompt(context, question)
+
         # Step 7: Get answer from LLM
-        answer = ask_gemini(llm_prompt)
+        # The summary tool needs the whole document, not the passage the LLM quotes
+        # (streaming mode keeps no chunk list, so the summary re-reads the document as it goes)
+        answer = ask_gemini(llm_prompt, tool_overrides={
+            "summarize_document": lambda _passage: summarize_chunks(
+                filename, (text for text, _ in iter_document_chunks(file_path)) if streaming else chunks
+            )
+        })
+        
+        if cache_hit:
+            # Sampled hit: compare with the fresh answer to measure false hits
+            get_answer_cache().audit(filename, question, cache_hit, answer)
+        else:
+            get_answer_cache().store(filename, question, question_embedding, answer)
         
         logger.info("Successfully processed document query")
         return answer
         
+    except LLMRateLimitError:
+        # Let the API turn this into a 429 instead of an error answer
+        raise
     except Exception as e:
         error_msg = f"Error processing document query: {str(e)}"
         logger.error(error_msg)
@@ -184,20 +583,17 @@ def process_document_only(file_path: str) -> dict:
         
         # Load and process document
         text = load_document(file_path)
-        cleaned_text = clean_text(text)
-        chunks = chunk_text(cleaned_text, max_chunk_size=500)
+        chunks, chunk_metadatas = build_chunks(text)
         
         # Initialize vector database
-        persist_dir = os.environ.get("VECTOR_DB_PERSIST_DIR", "vector_db")
-        db_client = init_chroma_db(persist_directory=persist_dir)
+        db_client = init_chroma_db(persist_directory=get_persist_dir())
         filename = os.path.basename(file_path)
-        collection_name = f"doc_{hash(filename) % 1000000}"
+        collection_name = register_document(filename)["collection_name"]
         collection = create_or_load_collection(db_client, collection_name=collection_name)
         
         # Store chunks
         embedder = get_embedder()
-        if collection.count() == 0:
-            store_chunks(chunks, collection, embedder=embedder)
+        ingest_chunks(filename, chunks, chunk_metadatas, collection, embedder=embedder)
         
         # Extract basic information using tools
         basic_info = {}
@@ -232,3 +628,34 @@ def process_document_only(file_path: str) -> dict:
             'status': 'error',
             'error': str(e)
         }
+
+def delete_document_data(filename: str) -> dict:
+    """
+    Remove everything derived from an uploaded document: its vector store
+    collection, cached artifacts and catalog entry.
+    
+    Args:
+        filename (str): Stored filename of the document (as returned by upload)
+        
+    Returns:
+        dict: Which artifacts were actually removed
+    """
+    entry = get_document(filename)
+    collection_name = entry['collection_name'] if entry else get_collection_name(filename)
+    removed = {'collection': False, 'cache': False, 'catalog': False}
+    
+    try:
+        # Versions of the same contract share a collection; keep it while any remain
+        if set(collection_references(collection_name)) <= {filename}:
+            db_client = init_chroma_db(persist_directory=get_persist_dir())
+            removed['collection'] = delete_collection(db_client, collection_name)
+    except Exception as e:
+        # Leave the rest of the cascade running; offline GC reclaims the collection later
+        logger.error(f"Error deleting collection {collection_name}: {str(e)}")
+    
+    get_answer_cache().invalidate(filename)
+    removed['cache'] = remove_cache_dir(filename)
+    removed['catalog'] = remove_document(filename)
+    
+    logger.info(f"Deleted data for {filename}: {removed}")
+    return removed
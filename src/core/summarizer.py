@@ -0,0 +1,271 @@
+"""
+Hierarchical (map-reduce) document summarization.
+
+Chunks are packed into groups that fit one LLM call, the groups are
+summarized in parallel (map), and the partial summaries are packed and
+summarized again (reduce) until the result fits the summary token budget.
+
+Every intermediate and final summary is stored on disk under the document's
+cache directory, keyed by a hash of its input, so repeating a summary request
+is a file read and a redlined version only re-summarizes the groups that
+changed. Without a configured LLM an extractive summary is built locally.
+"""
+
+import os
+import re
+import json
+import hashlib
+import itertools
+import logging
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompts change so stale cached summaries are not reused
+PROMPT_VERSION = "1"
+
+MAP_PROMPT = """Summarize the following excerpt of a legal document in at most {target} words.
+Keep party names, obligations, amounts, dates, term/termination and governing law.
+Do not add anything that is not in the excerpt.
+
+EXCERPT:
+\"\"\"
+{text}
+\"\"\"
+
+SUMMARY:"""
+
+REDUCE_PROMPT = """The following are summaries of consecutive parts of one legal document.
+Combine them into a single summary of at most {target} words, in document order,
+without repeating points.
+
+PART SUMMARIES:
+\"\"\"
+{text}
+\"\"\"
+
+SUMMARY:"""
+
+_STOPWORDS = set("""
+a an and are as at be by for from has have in is it its of on or shall that the their
+this to was were which will with any all such other under may not no than these those
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English legal text (about 4 tokens per 3 words)"""
+    return len(text.split()) * 4 // 3
+
+
+def extractive_summary(text: str, max_tokens: int) -> str:
+    """
+    Local fallback: keep the highest scoring sentences (by frequency of their
+    content words across the text) within the budget, in original order.
+    """
+    sentences = [s.strip() for s in re.split(r"(?<=[.;:])\s+", text) if len(s.split()) >= 4]
+    if not sentences:
+        return text[:max_tokens * 3]
+
+    words = [w for w in re.findall(r"[a-z]+", text.lower()) if w not in _STOPWORDS and len(w) > 2]
+    frequencies = Counter(words)
+    top = max(frequencies.values()) if frequencies else 1
+
+    def score(sentence):
+        terms = [w for w in re.findall(r"[a-z]+", sentence.lower()) if w in frequencies]
+        return sum(frequencies[w] / top for w in terms) / (len(terms) ** 0.5 or 1)
+
+    ranked = sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True)
+    chosen, used = [], 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i])
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def _pack(texts: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """Join consecutive texts into groups of at most max_tokens (one text may exceed it alone)"""
+    current, size = [], 0
+    for text in texts:
+        cost = estimate_tokens(text)
+        if current and size + cost > max_tokens:
+            yield "\n\n".join(current)
+            current, size = [], 0
+        current.append(text)
+        size += cost
+    if current:
+        yield "\n\n".join(current)
+
+
+class MapReduceSummarizer:
+    """
+    Args:
+        cache_dir (str): Directory for persisted summaries (None disables caching)
+        llm (callable): prompt -> text; None uses the extractive fallback
+        token_budget (int): Maximum size of the final summary
+        group_tokens (int): Maximum input size of one map/reduce call
+        map_tokens (int): Target size of each partial summary
+        concurrency (int): Parallel LLM calls per level
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, llm: Optional[Callable[[str], str]] = None,
+                 token_budget: int = 800, group_tokens: int = 3000, map_tokens: int = 250,
+                 concurrency: int = 4, max_depth: int = 5):
+        self.cache_dir = cache_dir
+        self.llm = llm
+        self.token_budget = token_budget
+        self.group_tokens = group_tokens
+        self.map_tokens = map_tokens
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_env(cls, cache_dir: Optional[str] = None, llm: Optional[Callable[[str], str]] = None):
+        return cls(
+            cache_dir=cache_dir,
+            llm=llm,
+            token_budget=int(os.environ.get("SUMMARY_TOKEN_BUDGET", "800")),
+            group_tokens=int(os.environ.get("SUMMARY_GROUP_TOKENS", "3000")),
+            map_tokens=int(os.environ.get("SUMMARY_MAP_TOKENS", "250")),
+            concurrency=int(os.environ.get("SUMMARY_CONCURRENCY", "4")),
+        )
+
+    # -- persistence -------------------------------------------------------
+
+    def _hasher(self, kind: str, target: int):
+        mode = "llm" if self.llm else "extractive"
+        return hashlib.sha1(f"{PROMPT_VERSION}\x00{mode}\x00{kind}\x00{target}\x00".encode("utf-8"))
+
+    def _key(self, kind: str, text: str, target: int) -> str:
+        hasher = self._hasher(kind, target)
+        hasher.update(text.encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, "summaries", f"{key}.json") if self.cache_dir else None
+
+    def _load(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)["summary"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key: str, summary: str, level: int):
+        path = self._path(key)
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"level": level, "summary": summary}, f)
+        os.replace(tmp_path, path)  # atomic, safe with several workers
+
+    # -- pipeline ----------------------------------------------------------
+
+    def _summarize(self, kind: str, text: str, target: int, level: int) -> str:
+        key = self._key(kind, text, target)
+        cached = self._load(key)
+        if cached is not None:
+            return cached
+
+        if self.llm is None:
+            summary = extractive_summary(text, target)
+        else:
+            prompt = (MAP_PROMPT if kind == "map" else REDUCE_PROMPT).format(target=target * 3 // 4, text=text)
+            summary = self.llm(prompt)
+
+        self._save(key, summary, level)
+        return summary
+
+    def _summarize_all(self, kind: str, groups: Iterable[str], target: int, level: int) -> List[str]:
+        """Summaries of groups in order; groups are read lazily, at most ``concurrency`` in flight"""
+        if self.concurrency <= 1:
+            return [self._summarize(kind, group, target, level) for group in groups]
+        summaries, pending = [], deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for group in groups:
+                if len(pending) >= self.concurrency:
+                    summaries.append(pending.popleft().result())
+                pending.append(pool.submit(self._summarize, kind, group, target, level))
+            summaries.extend(future.result() for future in pending)
+        return summaries
+
+    def summarize(self, chunks: Iterable[str]) -> str:
+        """
+        Summarize a whole document given all of its chunks, in order. Chunks
+        may be a generator: they are packed and mapped as they arrive, so
+        only the partial summaries are held in memory.
+        """
+        if isinstance(chunks, list) and chunks:
+            # Chunks already in memory: the final summary can be looked up before any map work
+            cached = self._load(self._key("final", "\x00".join(chunks), self.token_budget))
+            if cached is not None:
+                logger.info("Summary served from cache")
+                return cached
+
+        final_hash = self._hasher("final", self.token_budget)
+
+        def hashed(texts):
+            # Same key as _key("final", "\x00".join(chunks)), built as the chunks stream past
+            for i, text in enumerate(texts):
+                if i:
+                    final_hash.update(b"\x00")
+                final_hash.update(text.encode("utf-8"))
+                yield text
+
+        groups = _pack(hashed(chunks), self.group_tokens)
+        first = next(groups, None)
+        if first is None:
+            return "No content to summarize."
+        second = next(groups, None)
+
+        def cached_final():
+            cached = self._load(final_hash.hexdigest())
+            if cached is not None:
+                logger.info("Summary served from cache")
+            return cached
+
+        if second is None:
+            # The whole document fits one group, so its final key is already known
+            cached = cached_final()
+            if cached is not None:
+                return cached
+            groups = iter([first])
+        else:
+            groups = itertools.chain([first, second], groups)
+
+        if second is None and estimate_tokens(first) <= self.token_budget:
+            summary = self._summarize("reduce", first, self.token_budget, 1)
+        else:
+            # Map groups are cached individually, so a repeated request only reads them back
+            partials = self._summarize_all("map", groups, self.map_tokens, 1)
+            level = 1
+            logger.info(f"Map step: {len(partials)} groups summarized")
+            cached = cached_final() if second is not None else None
+            if cached is not None:
+                return cached
+
+            # Reduce until everything fits in one call, then produce the final summary
+            while len(partials) > 1 and sum(map(estimate_tokens, partials)) > self.group_tokens:
+                level += 1
+                if level > self.max_depth:
+                    # Partial summaries are not shrinking (e.g. the LLM ignores the target)
+                    partials = [extractive_summary("\n\n".join(partials), self.group_tokens)]
+                    break
+                partials = self._summarize_all("reduce", _pack(partials, self.group_tokens), self.map_tokens, level)
+                logger.info(f"Reduce level {level}: {len(partials)} partial summaries")
+
+            summary = self._summarize("reduce", "\n\n".join(partials), self.token_budget, level + 1)
+
+        if estimate_tokens(summary) > self.token_budget:
+            summary = extractive_summary(summary, self.token_budget)
+        self._save(final_hash.hexdigest(), summary, 0)
+        return summary
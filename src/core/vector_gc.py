@@ -0,0 +1,289 @@
+"""
+Offline garbage collection for the vector store.
+
+Finds Chroma collections, HNSW segment folders, cache directories and catalog
+entries that no longer belong to an uploaded document, reclaims them and
+vacuums ``chroma.sqlite3``. Run it while the API is stopped:
+
+    python -m src.core.vector_gc --dry-run
+    python -m src.core.vector_gc
+"""
+
+import os
+import sys
+import re
+import shutil
+import sqlite3
+import argparse
+import logging
+from typing import Dict, List, Set
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.core.catalog import (
+    get_persist_dir, get_upload_dir, get_cache_root, get_collection_name,
+    list_catalog, remove_document
+)
+
+logger = logging.getLogger(__name__)
+
+# Collections not tied to an uploaded document (used by the src/main.py demo)
+PROTECTED_COLLECTIONS = {"legal_chunks"}
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _live_filenames(upload_dir: str) -> Set[str]:
+    if not os.path.isdir(upload_dir):
+        # A mistyped or unmounted UPLOAD_DIR would make every document look deleted
+        raise RuntimeError(f"Upload directory {os.path.abspath(upload_dir)} does not exist; refusing to collect garbage")
+    return {f for f in os.listdir(upload_dir) if os.path.isfile(os.path.join(upload_dir, f))}
+
+
+def _freelist_bytes(sqlite_path: str) -> int:
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+    return page_size * free_pages
+
+
+def _sqlite_bytes_by_collection(sqlite_path: str, names: List[str]) -> Dict[str, int]:
+    """
+    Estimate the chroma.sqlite3 space held by each named collection: its
+    share of the embeddings, metadata, full-text and write-ahead queue rows,
+    applied to the pages those tables (and their indexes) occupy.
+    """
+    if not names or not os.path.exists(sqlite_path):
+        return {name: 0 for name in names}
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        try:
+            table_bytes = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+        except sqlite3.OperationalError:
+            logger.warning("SQLite was built without dbstat; not counting collection rows in chroma.sqlite3")
+            return {name: 0 for name in names}
+        owners = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"))
+
+        def pages(table):
+            # Pages of the table and its indexes; an FTS5 table keeps its rows in shadow tables
+            shadow = table == "embedding_fulltext_search"
+            return sum(
+                size for name, size in table_bytes.items()
+                if owners.get(name) == table or (shadow and (name or "").startswith(f"{table}_"))
+            )
+
+        # (table, payload of one collection's rows, payload of all rows); ? is the collection id
+        shares = [
+            ("embeddings_queue",
+             "SELECT SUM(length(vector) + IFNULL(length(metadata), 0) + length(id)) FROM embeddings_queue "
+             "WHERE topic LIKE '%/' || ?",
+             "SELECT SUM(length(vector) + IFNULL(length(metadata), 0) + length(id)) FROM embeddings_queue"),
+            ("embeddings",
+             "SELECT COUNT(*) FROM embeddings WHERE segment_id IN (SELECT id FROM segments WHERE collection = ?)",
+             "SELECT COUNT(*) FROM embeddings"),
+            ("embedding_metadata",
+             "SELECT SUM(length(key) + IFNULL(length(string_value), 8)) FROM embedding_metadata WHERE id IN "
+             "(SELECT e.id FROM embeddings e JOIN segments s ON e.segment_id = s.id WHERE s.collection = ?)",
+             "SELECT SUM(length(key) + IFNULL(length(string_value), 8)) FROM embedding_metadata"),
+            ("embedding_fulltext_search",
+             "SELECT SUM(length(c0)) FROM embedding_fulltext_search_content WHERE id IN "
+             "(SELECT e.id FROM embeddings e JOIN segments s ON e.segment_id = s.id WHERE s.collection = ?)",
+             "SELECT SUM(length(c0)) FROM embedding_fulltext_search_content"),
+        ]
+        ids = dict(conn.execute("SELECT name, id FROM collections").fetchall())
+        result = {}
+        for name in names:
+            total = 0
+            for table, part_sql, all_sql in shares:
+                try:
+                    part = conn.execute(part_sql, (ids.get(name),)).fetchone()[0] or 0
+                    whole = conn.execute(all_sql).fetchone()[0] or 0
+                except sqlite3.OperationalError:
+                    continue  # table missing in this Chroma version
+                if whole:
+                    total += int(pages(table) * part / whole)
+            result[name] = total
+        return result
+    finally:
+        conn.close()
+
+
+def collect_garbage(dry_run: bool = True, force: bool = False) -> dict:
+    """
+    Find and (unless ``dry_run``) reclaim storage not referenced by any live document.
+
+    A document is live when its file is still present in the upload directory.
+    Raises RuntimeError when the upload directory is missing, or when it is
+    empty while the catalog still lists documents (unless ``force``).
+
+    Args:
+        dry_run (bool): Only report what would be removed
+        force (bool): Collect even if no uploaded file is left for a non-empty catalog
+
+    Returns:
+        dict: Report of orphaned items and the bytes reclaimed (or reclaimable)
+    """
+    from src.vector_store import init_chroma_db, delete_collection, read_segment_ids
+
+    persist_dir = get_persist_dir()
+    sqlite_path = os.path.join(persist_dir, "chroma.sqlite3")
+    live_files = _live_filenames(get_upload_dir())
+    catalog = list_catalog()
+    if not live_files and catalog and not force:
+        raise RuntimeError(
+            f"No uploaded files in {os.path.abspath(get_upload_dir())} but the catalog lists "
+            f"{len(catalog)} documents; check UPLOAD_DIR or pass --force to reclaim them all"
+        )
+    # Revisions share their first version's collection, so take names from the catalog too
+    live_collections = (
+        {get_collection_name(f) for f in live_files}
+        | {entry["collection_name"] for entry in catalog if entry["filename"] in live_files}
+        | PROTECTED_COLLECTIONS
+    )
+
+    report = {
+        "dry_run": dry_run,
+        "collections": [],
+        "segment_folders": [],
+        "cache_dirs": [],
+        "catalog_entries": [],
+        "sqlite_bytes": 0,
+        "total_bytes": 0,
+    }
+
+    # Orphaned collections: every collection not backing a live document
+    segments = read_segment_ids(persist_dir)
+    orphan_collections = sorted(name for name in segments if name not in live_collections)
+    sqlite_bytes = _sqlite_bytes_by_collection(sqlite_path, orphan_collections)
+    for name in orphan_collections:
+        size = sum(
+            _dir_size(os.path.join(persist_dir, seg_id))
+            for seg_id in segments[name]
+            if os.path.isdir(os.path.join(persist_dir, seg_id))
+        )
+        # sqlite_bytes is counted in the report's SQLite total, which VACUUM measures on a real run
+        report["collections"].append({"name": name, "bytes": size, "sqlite_bytes": sqlite_bytes[name]})
+
+    if orphan_collections and not dry_run:
+        client = init_chroma_db(persist_directory=persist_dir)
+        for name in orphan_collections:
+            delete_collection(client, name)
+            logger.info(f"Deleted orphaned collection: {name}")
+
+    # Segment folders left behind by collections deleted outside delete_collection
+    # (folders of the collections above are already counted and removed with them)
+    known_segments = {seg_id for ids in segments.values() for seg_id in ids}
+    orphan_segments = {seg_id for name in orphan_collections for seg_id in segments[name]}
+    if os.path.isdir(persist_dir):
+        for entry in sorted(os.listdir(persist_dir)):
+            path = os.path.join(persist_dir, entry)
+            if not (os.path.isdir(path) and _UUID_RE.match(entry)):
+                continue
+            if entry in known_segments and entry not in orphan_segments:
+                continue
+            if entry not in orphan_segments:
+                report["segment_folders"].append({"path": path, "bytes": _dir_size(path)})
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+
+    # Cached artifacts of documents that are gone
+    cache_root = get_cache_root()
+    if os.path.isdir(cache_root):
+        for entry in sorted(os.listdir(cache_root)):
+            path = os.path.join(cache_root, entry)
+            if not os.path.isdir(path) or entry in live_collections:
+                continue
+            report["cache_dirs"].append({"path": path, "bytes": _dir_size(path)})
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+
+    # Catalog entries whose file was removed
+    for entry in catalog:
+        if entry["filename"] in live_files:
+            continue
+        report["catalog_entries"].append(entry["filename"])
+        if not dry_run:
+            remove_document(entry["filename"])
+
+    # Free pages in chroma.sqlite3 (including those of deleted collections); VACUUM gives them back
+    if os.path.exists(sqlite_path):
+        if dry_run:
+            # Free pages now plus the pages the orphaned collections' rows will free
+            report["sqlite_bytes"] = _freelist_bytes(sqlite_path) + sum(sqlite_bytes.values())
+        else:
+            before = os.path.getsize(sqlite_path)
+            conn = sqlite3.connect(sqlite_path, timeout=30)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+            report["sqlite_bytes"] = max(before - os.path.getsize(sqlite_path), 0)
+
+    report["total_bytes"] = (
+        sum(item["bytes"] for item in report["collections"])
+        + sum(item["bytes"] for item in report["segment_folders"])
+        + sum(item["bytes"] for item in report["cache_dirs"])
+        + report["sqlite_bytes"]
+    )
+    return report
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def print_report(report: dict):
+    verb = "Would reclaim" if report["dry_run"] else "Reclaimed"
+    print(f"[INFO] Orphaned collections: {len(report['collections'])}")
+    for item in report["collections"]:
+        print(f"  - {item['name']} ({_format_bytes(item['bytes'])} segments, "
+              f"{_format_bytes(item['sqlite_bytes'])} in chroma.sqlite3)")
+    print(f"[INFO] Orphaned segment folders: {len(report['segment_folders'])}")
+    for item in report["segment_folders"]:
+        print(f"  - {item['path']} ({_format_bytes(item['bytes'])})")
+    print(f"[INFO] Orphaned cache directories: {len(report['cache_dirs'])}")
+    for item in report["cache_dirs"]:
+        print(f"  - {item['path']} ({_format_bytes(item['bytes'])})")
+    print(f"[INFO] Stale catalog entries: {len(report['catalog_entries'])}")
+    for filename in report["catalog_entries"]:
+        print(f"  - {filename}")
+    print(f"[INFO] SQLite space: {_format_bytes(report['sqlite_bytes'])}")
+    print(f"[INFO] {verb} {_format_bytes(report['total_bytes'])} in total")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reclaim vector store space held by deleted documents")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    parser.add_argument("--force", action="store_true",
+                        help="Collect even when the upload directory is empty but the catalog is not")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        report = collect_garbage(dry_run=args.dry_run, force=args.force)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
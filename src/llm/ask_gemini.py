@@ -1,17 +1,54 @@
 import os
+import re
+from typing import Callable, Dict, Optional
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 from src.tools.tool_registry import TOOLS
+from src.llm.cassette import Cassette
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 genai.configure(api_key=GOOGLE_API_KEY)
 
-def ask_gemini(prompt: str) -> str:
+class LLMRateLimitError(Exception):
+    """Gemini rejected the call with a rate limit / quota error (HTTP 429)"""
+
+    def __init__(self, message: str, retry_after: int = 30):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _retry_delay(error: Exception, default: int = 30) -> int:
+    # Quota errors carry e.g. "retry_delay { seconds: 23 }" in their details
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(error))
+    return int(match.group(1)) if match else default
+
+# Optional record/replay of Gemini calls (LLM_CASSETTE), used for load tests and CI
+_cassette = Cassette.from_env()
+
+def llm_configured() -> bool:
+    return bool(GOOGLE_API_KEY) or (_cassette is not None and _cassette.mode == "replay")
+
+def _call_gemini(prompt: str) -> str:
     model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
-    answer = response.text.strip()
+    try:
+        response = model.generate_content(prompt)
+    except google_exceptions.TooManyRequests as e:
+        raise LLMRateLimitError(str(e), retry_after=_retry_delay(e)) from e
+    return response.text.strip()
+
+def generate_text(prompt: str) -> str:
+    """Plain Gemini completion, without tool dispatch"""
+    if _cassette is not None:
+        return _cassette.call(prompt, _call_gemini)
+    return _call_gemini(prompt)
+
+def ask_gemini(prompt: str, tool_overrides: Optional[Dict[str, Callable]] = None) -> str:
+    # tool_overrides lets the caller bind tools to document state, e.g. a
+    # summarize_document that sees every chunk rather than the quoted passage
+    answer = generate_text(prompt)
+    tools = {**TOOLS, **(tool_overrides or {})}
 
     if "use tool:" in answer:
         lines = answer.splitlines()
@@ -19,8 +56,8 @@ def ask_gemini(prompt: str) -> str:
             if line.lower().startswith("use tool:"):
                 _, tool_call = line.split(":", 1)
                 tool_name, *args = tool_call.strip().split(" ", 1)
-                if tool_name in TOOLS:
-                    func = TOOLS[tool_name]
+                if tool_name in tools:
+                    func = tools[tool_name]
                     input_arg = args[0] if args else prompt
                     tool_result = func(input_arg)
                     return f"Tool `{tool_name}` executed.\n\nResult:\n{tool_result}"
@@ -0,0 +1,85 @@
+"""
+Record/replay cassette for Gemini responses.
+
+With LLM_CASSETTE=<path> and LLM_CASSETTE_MODE=record, every real Gemini call
+is stored with its latency. With LLM_CASSETTE_MODE=replay no network call is
+made: a prompt seen before gets its recorded response, any other prompt gets
+a recorded response picked at random, and the call sleeps for a latency
+sampled from the recorded latencies (scaled by LLM_CASSETTE_LATENCY_SCALE).
+This lets load tests and CI exercise the full pipeline offline with
+realistic LLM timing.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Callable, Optional
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay", seed: Optional[int] = None,
+                 latency_scale: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = {entry["key"]: entry for entry in json.load(f)["interactions"]}
+        if mode == "replay" and not self.entries:
+            raise ValueError(f"Cassette {path} has no recorded interactions to replay")
+        self._latencies = [entry["latency"] for entry in self.entries.values()]
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        path = os.environ.get("LLM_CASSETTE")
+        if not path:
+            return None
+        seed = os.environ.get("LLM_CASSETTE_SEED")
+        return cls(
+            path,
+            mode=os.environ.get("LLM_CASSETTE_MODE", "replay"),
+            seed=int(seed) if seed else None,
+            latency_scale=float(os.environ.get("LLM_CASSETTE_LATENCY_SCALE", "1.0")),
+        )
+
+    @staticmethod
+    def _key(prompt: str) -> str:
+        return hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+    def call(self, prompt: str, generate: Callable[[str], str]) -> str:
+        """Answer ``prompt`` from the cassette, or via ``generate`` when recording"""
+        if self.mode == "record":
+            started = time.perf_counter()
+            response = generate(prompt)
+            self._record(prompt, response, time.perf_counter() - started)
+            return response
+
+        entry = self.entries.get(self._key(prompt))
+        with self._lock:
+            if entry is None:
+                entry = self._random.choice(list(self.entries.values()))
+            latency = self._random.choice(self._latencies)
+        time.sleep(latency * self.latency_scale)
+        return entry["response"]
+
+    def _record(self, prompt: str, response: str, latency: float):
+        with self._lock:
+            self.entries[self._key(prompt)] = {
+                "key": self._key(prompt),
+                "prompt_preview": prompt[-200:],
+                "response": response,
+                "latency": round(latency, 4),
+            }
+            self._latencies.append(latency)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"interactions": list(self.entries.values())}, f, indent=1)
+            os.replace(tmp_path, self.path)
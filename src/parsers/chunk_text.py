@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List
 
 def clean_text(text: str) -> str:
     # Remove excessive whitespace
@@ -15,3 +15,181 @@ def chunk_text(text: str, max_chunk_size: int = 500) -> List[str]:
         chunks.append(chunk)
 
     return chunks
+
+def iter_fixed_chunks(lines: Iterable[str], max_chunk_size: int = 500) -> Iterator[str]:
+    """
+    Streaming chunk_text(clean_text(text)): windows of max_chunk_size words
+    over lines read one at a time, holding at most one window in memory.
+    """
+    words = []
+    for line in lines:
+        words.extend(line.split())
+        while len(words) >= max_chunk_size:
+            yield " ".join(words[:max_chunk_size])
+            del words[:max_chunk_size]
+    if words:
+        yield " ".join(words)
+
+# Clause-aware segmentation
+# -------------------------
+# Works on the raw (uncleaned) text because line breaks are what mark headings.
+
+_ARTICLE_RE = re.compile(r"^(ARTICLE|Article)\s+([IVXLC]+|\d+)\b[.:]?\s*(.*)$")
+_SECTION_WORD_RE = re.compile(r"^(SECTION|Section)\s+(\d+(?:\.\d+)*)\b[.:]?\s*(.*)$")
+_NUMBERED_RE = re.compile(r"^(\d{1,2}(?:\.\d{1,3})+\.?|\d{1,2}[.)])(\([a-z]{1,4}\))?\s+([A-Z(“\"].*)$")
+_SUBCLAUSE_RE = re.compile(r"^\(([a-z]|[ivx]{1,4})\)\s+(\S.*)$")
+_DEFINITION_RE = re.compile(
+    r"^[“\"]([^”\"]{1,80})[”\"]\s+(?:shall\s+)?(?:means?|includes?|has the meaning|refers? to)\b"
+)
+
+
+def _is_caps_heading(line: str) -> bool:
+    words = line.split()
+    return (
+        0 < len(words) <= 8
+        and line.upper() == line
+        and any(c.isalpha() for c in line)
+        and not line.endswith((".", ",", ";"))
+    )
+
+
+def _match_heading(line: str, stack: List[tuple]) -> List[tuple]:
+    """
+    Return the (level, label, kind) entries a line opens, or [] for body text.
+    Levels: 0 = ARTICLE, 1..n = depth of the dotted number; sub-clauses and
+    definitions sit one level under the section that encloses them.
+    """
+    m = _ARTICLE_RE.match(line)
+    if m:
+        return [(0, f"ARTICLE {m.group(2)}", "section")]
+
+    m = _SECTION_WORD_RE.match(line)
+    if m:
+        number = m.group(2)
+        return [(number.count(".") + 1, number, "section")]
+
+    m = _NUMBERED_RE.match(line)
+    if m:
+        number, sub, _ = m.groups()
+        number = number.rstrip(".)")
+        level = number.count(".") + 1
+        entries = [(level, number, "section")]
+        if sub:
+            entries.append((level + 1, f"{number}{sub}", "clause"))
+        return entries
+
+    # Sub-clauses and definitions hang off the nearest numbered/headed section
+    parent = next((entry for entry in reversed(stack) if entry[2] == "section"), None)
+    m = _SUBCLAUSE_RE.match(line)
+    if m:
+        label = f"{parent[1]}({m.group(1)})" if parent else f"({m.group(1)})"
+        return [((parent[0] if parent else 0) + 1, label, "clause")]
+
+    m = _DEFINITION_RE.match(line)
+    if m:
+        return [((parent[0] if parent else 0) + 1, f"def:{m.group(1)}", "definition")]
+
+    if _is_caps_heading(line):
+        in_article = any(entry[0] == 0 for entry in stack)
+        return [(1 if in_article else 0, line.title(), "section")]
+
+    return []
+
+
+_TITLE_SMALL_WORDS = {"a", "an", "and", "of", "or", "the", "to", "for", "in", "on", "by", "with"}
+
+
+def _heading_has_body(line: str, entries: List[tuple]) -> bool:
+    """
+    Whether a heading line also carries clause text ("3. Term. This Agreement
+    lasts two years.") rather than just a title ("ARTICLE IV CONFIDENTIALITY").
+    """
+    if entries[-1][2] != "section":
+        return True  # sub-clauses and definitions are clause text themselves
+    if _is_caps_heading(line):
+        return False
+    m = _ARTICLE_RE.match(line) or _SECTION_WORD_RE.match(line) or _NUMBERED_RE.match(line)
+    title = m.group(3) if m else line
+    words = title.split()
+    return (
+        len(words) > 8
+        or bool(re.search(r"[.;:]\s+\S", title))
+        # A punctuated sentence ("The Supplier shall:") rather than a title ("Term.")
+        or (title.endswith((".", ";", ",", ":")) and any(
+            w[0].islower() and w.strip(".;:,") not in _TITLE_SMALL_WORDS for w in words
+        ))
+    )
+
+
+def chunk_clauses(text: str, max_chunk_size: int = 300, min_chunk_size: int = 20) -> List[dict]:
+    """
+    Split a legal document along its own structure instead of fixed windows.
+
+    Detects numbered sections ("1.", "2.3", "2.3(a)", "Section 4"), articles
+    ("ARTICLE IV"), all-caps headings and defined-term blocks. Sections longer
+    than ``max_chunk_size`` words are windowed. Heading-only fragments (a title
+    with no clause text, shorter than ``min_chunk_size`` words) are folded into
+    the following section; short clauses keep their own chunk and path.
+
+    Returns:
+        List[dict]: One entry per chunk with ``text``, ``section_path``
+        (e.g. "ARTICLE IV > 4.2 > 4.2(a)"), ``parent_section`` (the path of the
+        enclosing section, "" at top level) and ``position``.
+    """
+    return list(iter_clauses(text.splitlines(), max_chunk_size, min_chunk_size))
+
+
+def iter_clauses(lines: Iterable[str], max_chunk_size: int = 300, min_chunk_size: int = 20) -> Iterator[dict]:
+    """
+    Streaming chunk_clauses over lines read one at a time (e.g. page by page).
+    Full windows are yielded as soon as they fill, so memory holds at most one
+    window of the current section plus any folded heading fragments.
+    """
+    stack: List[tuple] = []
+    path: List[str] = []
+    words: List[str] = []   # current section's words not yet yielded (after any carried fragment)
+    in_section = False      # the current section has at least one line
+    has_body = False        # the current section has clause text, not just a title
+    windowed = False        # the current section already yielded a full window
+    position = 0
+
+    def chunk(text):
+        return {
+            "text": text,
+            "section_path": " > ".join(path),
+            "parent_section": " > ".join(path[:-1]),
+            "position": position,
+        }
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        entries = _match_heading(line, stack)
+        if entries:
+            # Close the previous section, folding heading-only fragments
+            # ("ARTICLE IV CONFIDENTIALITY") into the one that follows
+            if in_section and (has_body or windowed or len(words) >= min_chunk_size):
+                if words:
+                    yield chunk(" ".join(words))
+                    position += 1
+                words = []
+            for level, label, kind in entries:
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, label, kind))
+            path = [entry[1] for entry in stack]
+            in_section, windowed = True, False
+            has_body = _heading_has_body(line, entries)
+        else:
+            in_section = has_body = True
+
+        words.extend(line.split())
+        while len(words) >= max_chunk_size:
+            yield chunk(" ".join(words[:max_chunk_size]))
+            position += 1
+            del words[:max_chunk_size]
+            windowed = True
+
+    if words:
+        yield chunk(" ".join(words))
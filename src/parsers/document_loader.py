@@ -1,6 +1,9 @@
 import os
-from typing import Optional
-from PyPDF2 import PdfReader
+import zipfile
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+from PyPDF2 import PdfReader, PageObject
+from PyPDF2.generic import IndirectObject
 import docx
 
 def load_document(file_path: str) -> Optional[str]:
@@ -14,14 +17,89 @@ def load_document(file_path: str) -> Optional[str]:
         raise ValueError(f"Unsupported file format: {ext}")
 
 def load_pdf(file_path: str) -> str:
-    text = ""
-    with open(file_path, "rb") as f:
-        reader = PdfReader(f)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text.strip()
+    # Pages end on a line break so a heading at the top of a page starts its own line
+    return "\n".join(iter_pdf_pages(file_path)).strip()
 
 def load_docx(file_path: str) -> str:
     doc = docx.Document(file_path)
     text = "\n".join([para.text for para in doc.paragraphs])
-    return text.strip()
\ No newline at end of file
+    return text.strip()
+
+# Streaming loaders
+# -----------------
+# Yield a document a page (PDF) or paragraph (DOCX) at a time so large files
+# never exist as one string in memory.
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_RUN_TEXT = {f"{_W}tab": "\t", f"{_W}br": "\n", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+
+def iter_document_text(file_path: str) -> Iterator[str]:
+    ext = os.path.splitext(file_path)[-1].lower()
+
+    if ext == ".pdf":
+        return iter_pdf_pages(file_path)
+    elif ext == ".docx":
+        return iter_docx_paragraphs(file_path)
+    else:
+        raise ValueError(f"Unsupported file format: {ext}")
+
+_INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)
+        for page in _iter_page_objects(reader):
+            text = page.extract_text() or ""
+            # PdfReader keeps every object it parses (content streams included);
+            # drop them so memory does not grow with the page count
+            reader.resolved_objects.clear()
+            yield text
+
+def _iter_page_objects(reader: PdfReader) -> Iterator[PageObject]:
+    """
+    reader.pages without building the list of every page up front: walks the
+    page tree resolving one page at a time, with inherited attributes applied
+    as PdfReader does.
+    """
+    def walk(node, inherited, reference=None):
+        if node.get("/Type", "/Pages") == "/Pages":
+            inherited = {**inherited, **{k: node[k] for k in _INHERITABLE_PAGE_ATTRIBUTES if k in node}}
+            for kid in node["/Kids"]:
+                yield from walk(kid.get_object(), inherited, kid if isinstance(kid, IndirectObject) else None)
+        elif node["/Type"] == "/Page":
+            page = PageObject(reader, reference)
+            page.update({**inherited, **node})
+            yield page
+
+    yield from walk(reader.trailer["/Root"]["/Pages"].get_object(), {})
+
+def iter_docx_paragraphs(file_path: str) -> Iterator[str]:
+    """
+    Body paragraphs of a DOCX (the same ones as docx.Document().paragraphs),
+    parsed incrementally from word/document.xml instead of building the tree.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        depth = 0
+        body = None
+        for event, element in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    body = element
+                continue
+            depth -= 1
+            # document > body > p: depth 2 once the paragraph's end tag is seen
+            if depth == 2:
+                if element.tag == f"{_W}p":
+                    yield "".join(_run_text(run) for run in _paragraph_runs(element))
+                body.clear()  # drop parsed paragraphs and tables
+
+def _paragraph_runs(paragraph):
+    for child in paragraph:
+        if child.tag == f"{_W}r":
+            yield child
+        elif child.tag == f"{_W}hyperlink":
+            yield from child.iterfind(f"{_W}r")
+
+def _run_text(run) -> str:
+    return "".join(child.text or "" if child.tag == f"{_W}t" else _RUN_TEXT.get(child.tag, "") for child in run)
@@ -1,15 +1,57 @@
 from sentence_transformers import SentenceTransformer
 from chromadb.api.types import Documents, Embeddings, IDs
 
-def retrieve_relevant_chunks(query: str, collection, embedder=None, top_k: int = 5) -> list[str]:
-    if embedder is None:
-        embedder = SentenceTransformer("all-MiniLM-L6-v2")
+def retrieve_relevant_chunks(query: str, collection, embedder=None, top_k: int = 5,
+                             expand_parent: bool = False, max_parent_words: int = 1200,
+                             query_embedding=None) -> list[str]:
+    if query_embedding is None:
+        if embedder is None:
+            embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        query_embedding = embedder.encode(query)
 
-    query_embedding = embedder.encode(query).tolist()
+    query_embedding = list(map(float, query_embedding))
 
     results = collection.query(
         query_embeddings=[query_embedding],
         n_results=top_k,
+        include=["documents", "metadatas"],
     )
 
-    return results["documents"][0]  # a list of top-k chunk strings
+    documents = results["documents"][0]  # a list of top-k chunk strings
+    if not expand_parent:
+        return documents
+
+    metadatas = results["metadatas"][0] or [None] * len(documents)
+    return _expand_to_parent_sections(documents, metadatas, collection, max_parent_words)
+
+def _expand_to_parent_sections(documents, metadatas, collection, max_parent_words):
+    """
+    Replace each matched clause with its whole parent section (the parent's own
+    text plus its direct children) when that section fits in max_parent_words.
+    Chunks stored without section metadata are returned unchanged.
+    """
+    expanded = []
+    seen_parents = set()
+    for document, metadata in zip(documents, metadatas):
+        parent = (metadata or {}).get("parent_section")
+        if not parent:
+            expanded.append(document)
+            continue
+        if parent in seen_parents:
+            continue
+
+        section = collection.get(
+            where={"$or": [{"section_path": parent}, {"parent_section": parent}]},
+            include=["documents", "metadatas"],
+        )
+        parts = sorted(zip(section["metadatas"], section["documents"]), key=lambda p: p[0].get("position", 0))
+        parent_text = " ".join(text for _, text in parts)
+        if len(parent_text.split()) > max_parent_words:
+            expanded.append(document)
+            continue
+
+        seen_parents.add(parent)
+        expanded.append(parent_text)
+
+    # Drop repeats and clauses already contained in an expanded parent section
+    return [doc for doc in dict.fromkeys(expanded) if not any(doc != other and doc in other for other in expanded)]
@@ -7,7 +7,8 @@ def summarize_document(chunks: List[str]) -> str:
     Targets sections like Purpose, Confidentiality, Term, and Obligations.
     """
     summary = {}
-    content = "\n".join(chunks)
+    # The LLM tool call passes a single passage rather than a chunk list
+    content = chunks if isinstance(chunks, str) else "\n".join(chunks)
 
     sections = {
         "Purpose": r"(Purpose(?: of (this )?Agreement)?)[\s:]*([\s\S]{0,500})",
@@ -2,17 +2,130 @@ from sentence_transformers import SentenceTransformer
 import chromadb
 from chromadb.config import Settings
 import os
+import shutil
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
 
 def init_chroma_db(persist_directory="vector_db"):
     # Initialize Chroma with persistence
     client = chromadb.PersistentClient(path=persist_directory)
     return client
 
-def create_or_load_collection(client, collection_name="legal_chunks"):
-    collection = client.get_or_create_collection(name=collection_name)
+# Chroma's HNSW defaults, except cosine space since MiniLM vectors are normalized
+DEFAULT_INDEX_SETTINGS = {
+    "space": "cosine",
+    "M": 16,
+    "construction_ef": 100,
+    "search_ef": 100,
+}
+
+def get_index_settings(overrides=None):
+    """
+    HNSW settings for new collections, from VECTOR_INDEX_SPACE, VECTOR_INDEX_M,
+    VECTOR_INDEX_CONSTRUCTION_EF and VECTOR_INDEX_SEARCH_EF, then ``overrides``.
+    """
+    settings = {
+        "space": os.environ.get("VECTOR_INDEX_SPACE", DEFAULT_INDEX_SETTINGS["space"]),
+        "M": int(os.environ.get("VECTOR_INDEX_M", DEFAULT_INDEX_SETTINGS["M"])),
+        "construction_ef": int(os.environ.get("VECTOR_INDEX_CONSTRUCTION_EF", DEFAULT_INDEX_SETTINGS["construction_ef"])),
+        "search_ef": int(os.environ.get("VECTOR_INDEX_SEARCH_EF", DEFAULT_INDEX_SETTINGS["search_ef"])),
+    }
+    settings.update(overrides or {})
+    if settings["space"] not in ("cosine", "l2", "ip"):
+        raise ValueError(f"Unsupported vector index space: {settings['space']}")
+    return settings
+
+def index_metadata(settings):
+    # Recorded on the collection so every index says how it is built. Not under
+    # Chroma's own "hnsw:" keys: Chroma rejects any metadata update that
+    # carries hnsw:space, so those could not follow a search_ef change.
+    return {f"index:{key}": value for key, value in settings.items()}
+
+# Chroma's own configuration keys for the settings above
+_CONFIG_KEYS = {"space": "space", "M": "max_neighbors", "construction_ef": "ef_construction", "search_ef": "ef_search"}
+
+def index_configuration(settings):
+    return {"hnsw": {config_key: settings[key] for key, config_key in _CONFIG_KEYS.items()}}
+
+# Collections already reported as built with other settings, to warn once per process
+_mismatch_reported = set()
+
+def _built_settings(collection):
+    """Settings the collection's index actually uses, from its Chroma configuration"""
+    hnsw = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+    return {key: hnsw.get(config_key) for key, config_key in _CONFIG_KEYS.items()}
+
+def create_or_load_collection(client, collection_name="legal_chunks", index_settings=None):
+    settings = get_index_settings(index_settings)
+    collection = client.get_or_create_collection(
+        name=collection_name, metadata=index_metadata(settings), configuration=index_configuration(settings)
+    )
+
+    # Space, M and construction_ef are fixed when the index is built; only search_ef can change
+    # later, and it applies the next time the index is loaded (e.g. on restart)
+    built = _built_settings(collection)
+    built_with = {key: built[key] for key in ("space", "M", "construction_ef")}
+    wanted = {key: settings[key] for key in built_with}
+    if built_with != wanted and collection_name not in _mismatch_reported:
+        _mismatch_reported.add(collection_name)
+        logger.warning(
+            f"Collection {collection_name} was built with {built_with}, not {wanted}; "
+            "delete and re-ingest it to apply the new index settings"
+        )
+
+    # Keep the recorded settings in line with the index (older collections have none
+    # or carry hnsw:* keys, which Chroma will not accept back in an update)
+    recorded = collection.metadata or {}
+    current = index_metadata({**built, "search_ef": settings["search_ef"]})
+    if built["search_ef"] != settings["search_ef"] or any(recorded.get(k) != v for k, v in current.items()):
+        metadata = {k: v for k, v in recorded.items() if not k.startswith("hnsw:")}
+        try:
+            collection.modify(
+                metadata={**metadata, **current},
+                configuration={"hnsw": {"ef_search": settings["search_ef"]}}
+            )
+        except Exception as e:
+            logger.warning(f"Could not update search_ef for {collection_name}: {str(e)}")
     return collection
 
-def store_chunks(chunks, collection, embedder=None):
+def list_collection_names(client):
+    # Older Chroma releases return names, newer ones return Collection objects
+    return [getattr(c, "name", c) for c in client.list_collections()]
+
+def read_segment_ids(persist_directory):
+    """Map collection name -> segment ids, read straight from Chroma's SQLite file"""
+    segments = {}
+    sqlite_path = os.path.join(persist_directory, "chroma.sqlite3")
+    if not os.path.exists(sqlite_path):
+        return segments
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        rows = conn.execute(
+            "SELECT c.name, s.id FROM segments s JOIN collections c ON s.collection = c.id"
+        ).fetchall()
+    finally:
+        conn.close()
+    for name, segment_id in rows:
+        segments.setdefault(name, []).append(segment_id)
+    return segments
+
+def delete_collection(client, collection_name):
+    """
+    Drop a collection and its segments, including the HNSW segment folders
+    Chroma leaves on disk. Returns False if it did not exist.
+    """
+    if collection_name not in list_collection_names(client):
+        return False
+    persist_directory = client.get_settings().persist_directory
+    segment_ids = read_segment_ids(persist_directory).get(collection_name, []) if persist_directory else []
+    client.delete_collection(name=collection_name)
+    for segment_id in segment_ids:
+        shutil.rmtree(os.path.join(persist_directory, segment_id), ignore_errors=True)
+    return True
+
+def store_chunks(chunks, collection, embedder=None, metadatas=None, ids=None):
     if embedder is None:
         embedder = SentenceTransformer("all-MiniLM-L6-v2")
 
@@ -23,7 +136,8 @@ def store_chunks(chunks, collection, embedder=None):
         collection.add(
             documents=[chunk],
             embeddings=[embedding.tolist()],
-            ids=[f"chunk-{i}"]
+            ids=[ids[i] if ids else f"chunk-{i}"],
+            metadatas=[metadatas[i]] if metadatas else None
         )
 
 def preview_collection(collection, n: int = 5):